@@ -7,35 +7,48 @@ POST /detect-scam   → returns scam/legit classification + confidence
 GET  /health        → health check
 GET  /model-info    → model metadata
 
-Install: pip install fastapi uvicorn scikit-learn
+Install: pip install fastapi uvicorn scikit-learn orjson
 Run:     uvicorn api:app --reload --port 8001
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from pydantic import BaseModel, Field
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, List
-from datetime import datetime
 import numpy as np
-import pandas as pd
 import joblib
 import json
 import os
 import sys
+import threading
+import time
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from features import engineer_features, FEATURE_COLUMNS, HIGH_RISK_MCCS, NORMAL_SENIOR_MCCS
-from scam_detector import extract_text_features, train_model
+from features import load_baselines, BASELINE_FILES, engineer_features_single, engineer_features_compiled, numba_baseline, compact_baseline, mcc_bitmask, FEATURE_COLUMNS, FEATURE_INDEX, HIGH_RISK_MCCS, NORMAL_SENIOR_MCCS
+from scam_detector import extract_text_features_batch, score_batch as scam_score_batch, train_model, FusedScamScorer
+from batching import DynBatcher
+from iforest import CompiledIsolationForest
+from jit import NUMBA_AVAILABLE
 
 # --- Load models at startup ---
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 
 def load_models():
     try:
-        iso      = joblib.load(os.path.join(MODEL_DIR, "isolation_forest.pkl"))
-        lr       = joblib.load(os.path.join(MODEL_DIR, "logistic_regression.pkl"))
-        scaler   = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"))
-        baselines = joblib.load(os.path.join(MODEL_DIR, "baselines.pkl"))
+        # mmap_mode="r" keeps numeric arrays in the page cache, shared by all workers
+        iso      = joblib.load(os.path.join(MODEL_DIR, "isolation_forest.pkl"), mmap_mode="r")
+        lr       = joblib.load(os.path.join(MODEL_DIR, "logistic_regression.pkl"), mmap_mode="r")
+        scaler   = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"), mmap_mode="r")
+        if os.path.exists(os.path.join(MODEL_DIR, BASELINE_FILES["stats"])):
+            baselines = load_baselines(MODEL_DIR)
+        else:  # model dirs trained before baselines moved to Parquet
+            baselines = joblib.load(os.path.join(MODEL_DIR, "baselines.pkl"))
         with open(os.path.join(MODEL_DIR, "feature_importance.json")) as f:
             feature_importance = json.load(f)
         with open(os.path.join(MODEL_DIR, "anomaly_score_range.json")) as f:
@@ -56,19 +69,146 @@ def load_scam_model():
 
 iso, lr, scaler, baselines, feature_importance, score_range = load_models()
 scam_pipeline = load_scam_model()
+# One-pass TF-IDF · LR scorer; falls back to the sklearn pipeline if it can't be fused
+scam_scorer = FusedScamScorer.from_pipeline(scam_pipeline) or scam_pipeline
+
+# Frozensets + MCC bitmask make the per-request membership tests cheap
+if baselines is not None:
+    baselines = {user_id: compact_baseline(b) for user_id, b in baselines.items()}
+EMPTY_MCC_MASK = mcc_bitmask(())
+EMPTY_HOUR_HIST = np.zeros(24, dtype=np.int32)
+
+# Numba feature kernel inputs, packed once per user
+NB_BASELINES = {user_id: numba_baseline(b) for user_id, b in (baselines or {}).items()} if NUMBA_AVAILABLE else {}
+
+def _baseline_summary(user_id: str, baseline: dict) -> dict:
+    """Precomputed /users/{user_id}/baseline payload (rounded once, tuples not sets)."""
+    return {
+        "user_id": user_id,
+        "mean_amount":  round(float(baseline["mean_amount"]), 2),
+        "std_amount":   round(float(baseline["std_amount"]), 2),
+        "p95_amount":   round(float(baseline["p95_amount"]), 2),
+        "known_cities": tuple(sorted(baseline["known_cities"])),
+        "known_mccs":   tuple(sorted(str(m) for m in baseline["known_mccs"])),
+        "total_txns":   int(baseline["total_txns"]),
+    }
+
+BASELINE_SUMMARIES = {user_id: _baseline_summary(user_id, b) for user_id, b in (baselines or {}).items()}
+
+# --- Constants precomputed once so /score skips per-request lookups ---
+S_MIN, S_MAX = (score_range["min"], score_range["max"]) if score_range else (0.0, 0.0)
+INV_RANGE    = 1.0 / (S_MIN - S_MAX) if S_MIN != S_MAX else 0.0
+MCC_NAMES = {
+    "6051": "Gift Cards/Cryptocurrency",
+    "7995": "Gambling",
+    "6012": "Unusual Financial Transfer",
+    "4814": "Telecom (scam-associated)",
+}
+
+# Numba tree traversal replaces sklearn's per-tree Python loop when available.
+# train.py saves the node arrays; memory-mapping them shares one copy across workers.
+ISO_NODES_DIR = os.path.join(MODEL_DIR, "isolation_forest_nodes")
+if iso is not None and NUMBA_AVAILABLE:
+    if os.path.isdir(ISO_NODES_DIR):
+        iso_scorer = CompiledIsolationForest.load(ISO_NODES_DIR, mmap_mode="r")
+    else:  # model dirs trained before the node arrays were saved
+        iso_scorer = CompiledIsolationForest(iso)
+else:
+    iso_scorer = iso
+
+def sigmoid(z: np.ndarray) -> np.ndarray:
+    """Logistic function via tanh, which can't overflow for large |z| like 1 / (1 + exp(-z))."""
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+# StandardScaler folded into the LR weights: lr(scaler(X)) == sigmoid(X @ LR_W + LR_B)
+if lr is not None:
+    LR_W = (lr.coef_[0] / scaler.scale_)
+    LR_B = float(lr.intercept_[0] - (lr.coef_[0] * scaler.mean_ / scaler.scale_).sum())
+
+# --- Risk flags: one bit per flag, computed for a whole batch at once ---
+I_AMOUNT_RATIO     = FEATURE_INDEX["amount_ratio"]
+I_NEW_MERCHANT     = FEATURE_INDEX["is_new_merchant"]
+I_HIGH_RISK_MCC    = FEATURE_INDEX["is_high_risk_mcc"]
+I_NEW_CITY         = FEATURE_INDEX["is_new_city"]
+I_UNUSUAL_HOUR     = FEATURE_INDEX["is_unusual_hour"]
+I_HOUR_OF_DAY      = FEATURE_INDEX["hour_of_day"]
+I_VELOCITY_1H      = FEATURE_INDEX["velocity_1h"]
+
+def risk_flag_masks(X: np.ndarray) -> np.ndarray:
+    """Bitmask of triggered FLAG_TABLE entries for each feature row of X."""
+    ratio = X[:, I_AMOUNT_RATIO]
+    return (
+        (ratio > 3).astype(np.uint16)                          << 0 |
+        ((ratio > 1.5) & (ratio <= 3)).astype(np.uint16)       << 1 |
+        (X[:, I_NEW_MERCHANT] != 0).astype(np.uint16)          << 2 |
+        (X[:, I_HIGH_RISK_MCC] != 0).astype(np.uint16)         << 3 |
+        (X[:, I_NEW_CITY] != 0).astype(np.uint16)              << 4 |
+        (X[:, I_UNUSUAL_HOUR] != 0).astype(np.uint16)          << 5 |
+        (X[:, I_VELOCITY_1H] >= 3).astype(np.uint16)           << 6
+    )
+
+# (bit, flag, severity, description(vec, txn, baseline)) — order is the response order
+FLAG_TABLE = [
+    (1 << 0, "LARGE_AMOUNT", "high",
+     lambda vec, txn, b: f"Transaction is {vec[I_AMOUNT_RATIO]:.1f}x your usual spending (avg: ${b['mean_amount']:.0f})"),
+    (1 << 1, "ABOVE_AVERAGE_AMOUNT", "medium",
+     lambda vec, txn, b: f"Transaction is {vec[I_AMOUNT_RATIO]:.1f}x your usual spending"),
+    (1 << 2, "NEW_MERCHANT", "medium",
+     lambda vec, txn, b: f"First transaction with '{txn.merchant}'"),
+    (1 << 3, "HIGH_RISK_CATEGORY", "high",
+     lambda vec, txn, b: f"Merchant category: {MCC_NAMES.get(txn.mcc, 'High-risk category')} — frequently used in scams targeting seniors"),
+    (1 << 4, "NEW_LOCATION", "high",
+     lambda vec, txn, b: f"Transaction in '{txn.city}' — not in your usual locations"),
+    (1 << 5, "UNUSUAL_TIME", "medium",
+     lambda vec, txn, b: f"Transaction at {int(vec[I_HOUR_OF_DAY])}:00 AM — outside your normal activity hours"),
+    (1 << 6, "HIGH_VELOCITY", "high",
+     lambda vec, txn, b: f"{int(vec[I_VELOCITY_1H])} transactions in the last hour"),
+]
+
+# Concurrent /score and /detect-scam requests are grouped into one model call
+BATCH_MAX_SIZE  = 32
+BATCH_MAX_DELAY = 0.01  # seconds to wait for more requests to join a batch
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await score_batcher.start()
+    await scam_batcher.start()
+    yield
+    await score_batcher.stop()
+    await scam_batcher.stop()
 
 app = FastAPI(
     title="SafePay Family - Risk Scoring API",
     description="Real-time fraud risk scoring for senior financial protection",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Only the dashboard calls us from a browser (/detect-scam); the backend's
+# server-side calls don't need CORS. Comma-separated, e.g. for staging/prod.
+CORS_ORIGINS = [o.strip() for o in os.environ.get("CORS_ORIGINS", "http://localhost:3000").split(",") if o.strip()]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_credentials=False,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
 )
+# /score responses with prompt context run a few KB; small ones aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+@lru_cache(maxsize=2)
+def _utc_second_prefix(second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+
+def utc_now_iso() -> str:
+    """UTC timestamp formatted like datetime.utcnow().isoformat(); the date/time prefix is cached per second."""
+    now = time.time()
+    second = int(now)
+    return f"{_utc_second_prefix(second)}.{int((now - second) * 1_000_000):06d}"
 
 
 # ─── Request / Response Models ────────────────────────────────────────────────
@@ -83,7 +223,9 @@ class TransactionRequest(BaseModel):
     city: str           = Field(..., example="Unknown City")
     device_id: Optional[str] = None
 
-class RiskFlag(BaseModel):
+# Internal-only output records: plain dataclasses, never validated
+@dataclass(slots=True)
+class RiskFlag:
     flag: str
     description: str
     severity: str
@@ -107,7 +249,8 @@ class ScamDetectRequest(BaseModel):
     sms_content: Optional[str]   = Field(None, example="URGENT your account is suspended verify now")
     phone_number: Optional[str]  = Field(None, example="1-800-555-0199")
 
-class ScamSignal(BaseModel):
+@dataclass(slots=True)
+class ScamSignal:
     name: str
     detected: bool
     description: str
@@ -135,25 +278,22 @@ SIGNAL_DESCRIPTIONS = {
     "asks_for_credentials":   "Requests sensitive information (password, SSN, bank details)",
 }
 
-@app.post("/detect-scam", response_model=ScamDetectResponse)
-def detect_scam(req: ScamDetectRequest):
-    """Classify whether a message/contact is a scam using TF-IDF + Logistic Regression."""
+def detect_scam_batch(reqs: List[ScamDetectRequest]) -> List[dict]:
+    """Classify a batch of messages with one TF-IDF + Logistic Regression call."""
+    texts, signals = extract_text_features_batch([req.model_dump() for req in reqs])
 
-    # Require at least one field
-    if not any([req.email_address, req.email_body, req.sms_content, req.phone_number]):
-        raise HTTPException(status_code=400, detail="At least one input field is required.")
+    # Predict — vectorizing N texts at once is much cheaper than N single calls
+    scam_probs = scam_score_batch(scam_scorer, texts)
+
+    return [
+        _build_scam_response({name: int(flags[j]) for name, flags in signals.items()}, float(scam_prob))
+        for j, scam_prob in enumerate(scam_probs)
+    ]
 
-    combined_text, signal_flags = extract_text_features(
-        email_address=req.email_address,
-        email_body=req.email_body,
-        sms_content=req.sms_content,
-        phone_number=req.phone_number,
-    )
 
-    # Predict
-    proba       = scam_pipeline.predict_proba([combined_text])[0]
-    scam_prob   = float(proba[1])
-    label       = "SCAM" if scam_prob >= 0.5 else "SAFE"
+def _build_scam_response(signal_flags: dict, scam_prob: float) -> dict:
+    """Build the /detect-scam payload (shaped like ScamDetectResponse)."""
+    label = "SCAM" if scam_prob >= 0.5 else "SAFE"
 
     # Boost confidence if multiple signals fire
     signal_count = sum(v for k, v in signal_flags.items() if k != "is_empty")
@@ -195,15 +335,30 @@ def detect_scam(req: ScamDetectRequest):
     else:
         summary = "No significant scam indicators detected. This appears to be legitimate."
 
-    return ScamDetectResponse(
-        label=label,
-        confidence=round(confidence, 4),
-        confidence_pct=f"{confidence * 100:.1f}%",
-        risk_level=risk_level,
-        signals=signals,
-        summary=summary,
-        analyzed_at=datetime.utcnow().isoformat(),
-    )
+    return {
+        "label":          label,
+        "confidence":     round(confidence, 4),
+        "confidence_pct": f"{confidence * 100:.1f}%",
+        "risk_level":     risk_level,
+        "signals":        signals,
+        "summary":        summary,
+        "analyzed_at":    utc_now_iso(),
+    }
+
+
+scam_batcher = DynBatcher(detect_scam_batch, max_batch_size=BATCH_MAX_SIZE, max_delay=BATCH_MAX_DELAY)
+
+@app.post("/detect-scam", response_model=ScamDetectResponse)
+async def detect_scam(req: ScamDetectRequest):
+    """Classify whether a message/contact is a scam using TF-IDF + Logistic Regression."""
+
+    # Require at least one field
+    if not any([req.email_address, req.email_body, req.sms_content, req.phone_number]):
+        raise HTTPException(status_code=400, detail="At least one input field is required.")
+
+    # Returning the response directly skips FastAPI's re-validation against
+    # response_model (still used for the OpenAPI schema); orjson encodes once.
+    return ORJSONResponse(await scam_batcher.process_batched(req))
 
 
 # ─── Existing Routes ──────────────────────────────────────────────────────────
@@ -217,15 +372,8 @@ def normalize_single_anomaly(score: float, reference_scores: np.ndarray) -> floa
     return float(np.clip((flipped - min_s) / (max_s - min_s), 0, 1))
 
 
-def score_transaction(txn: TransactionRequest) -> ScoreResponse:
-    if iso is None:
-        raise HTTPException(status_code=503, detail="Models not loaded. Run training first.")
-
-    txn_dict = txn.dict()
-    txn_dict["authorized"] = True
-    txn_df = pd.DataFrame([txn_dict])
-    txn_df["timestamp"] = pd.to_datetime(txn_df["timestamp"])
-
+def _prepare_transaction(txn: TransactionRequest):
+    """Engineer the feature vector for one transaction against its user's baseline."""
     user_baseline = baselines.get(txn.user_id)
     if user_baseline is None:
         user_baseline = {
@@ -233,24 +381,93 @@ def score_transaction(txn: TransactionRequest) -> ScoreResponse:
             "std_amount":     txn.amount * 0.3,
             "median_amount":  txn.amount,
             "p95_amount":     txn.amount * 2,
-            "known_merchants": set(),
+            "known_merchants": frozenset(),
             "known_mccs":      set(),
-            "known_cities":    set(),
-            "normal_hours":    {},
+            "known_mcc_mask":  EMPTY_MCC_MASK,
+            "known_cities":    frozenset(),
+            "normal_hours":    EMPTY_HOUR_HIST,
             "total_txns":      0,
         }
 
-    feature_row = engineer_features(txn_df, {txn.user_id: user_baseline}).iloc[0]
-    X = np.array([feature_row[FEATURE_COLUMNS].values], dtype=float)
+    if NUMBA_AVAILABLE:
+        nb_baseline = NB_BASELINES.get(txn.user_id) or numba_baseline(user_baseline)
+        return engineer_features_compiled(txn.model_dump(), nb_baseline), user_baseline
+    return engineer_features_single(txn.model_dump(), user_baseline), user_baseline
+
+
+# --- Retries of the same transaction reuse its scores (LRU, bounded) ---
+SCORE_CACHE_SIZE = 4096
+_score_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_score_cache_lock = threading.Lock()
+
+def _score_cache_key(txn: TransactionRequest) -> tuple:
+    # Entries depend on the loaded models and baselines: anything that reloads them must call _score_cache.clear()
+    return (txn.transaction_id, txn.user_id, txn.amount, txn.mcc, txn.timestamp, txn.city, txn.merchant)
+
+def _score_cache_get(key: tuple) -> Optional[dict]:
+    with _score_cache_lock:
+        result = _score_cache.get(key)
+        if result is not None:
+            _score_cache.move_to_end(key)
+        return result
+
+def _score_cache_put(key: tuple, result: dict):
+    with _score_cache_lock:
+        _score_cache[key] = result
+        if len(_score_cache) > SCORE_CACHE_SIZE:
+            _score_cache.popitem(last=False)
+
+
+def _score_vectors(vecs: list) -> tuple:
+    """Anomaly scores, fraud probabilities and flag bitmasks (as Python lists) for feature vectors."""
+    X = np.vstack(vecs)
+    anomaly_scores = np.clip((iso_scorer.score_samples(X) - S_MAX) * INV_RANGE, 0, 1)
+    fraud_probs = sigmoid(X @ LR_W + LR_B)
+    return anomaly_scores.tolist(), fraud_probs.tolist(), risk_flag_masks(X).tolist()
+
+
+def score_batch(txns: List[TransactionRequest]) -> list:
+    """
+    Score a batch of transactions with one call per model.
+    Returns one response dict per transaction, or the exception raised while
+    preparing it (so a single malformed transaction doesn't fail the batch).
+    Identical retries are answered from the score cache with a fresh `scored_at`.
+    """
+    results = [None] * len(txns)
+    prepared = []
+    for i, txn in enumerate(txns):
+        cached = _score_cache_get(_score_cache_key(txn))
+        if cached is not None:
+            results[i] = {**cached, "scored_at": utc_now_iso()}
+            continue
+        try:
+            prepared.append((i, txn, *_prepare_transaction(txn)))
+        except Exception as e:
+            results[i] = e
+    if not prepared:
+        return results
+
+    anomaly_scores, fraud_probs, flags_masks = _score_vectors([vec for _, _, vec, _ in prepared])
+
+    for (i, txn, vec, user_baseline), anomaly_score, fraud_prob, flags_mask in zip(prepared, anomaly_scores, fraud_probs, flags_masks):
+        results[i] = _build_score_response(txn, vec, user_baseline, anomaly_score, fraud_prob, flags_mask)
+        _score_cache_put(_score_cache_key(txn), results[i])
+    return results
+
+
+def score_transaction(txn: TransactionRequest) -> dict:
+    if iso is None:
+        raise HTTPException(status_code=503, detail="Models not loaded. Run training first.")
 
-    raw_anomaly = iso.score_samples(X)[0]
-    s_min = score_range["min"]
-    s_max = score_range["max"]
-    anomaly_score = float(np.clip((raw_anomaly - s_max) / (s_min - s_max), 0, 1))
+    result = score_batch([txn])[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
 
-    X_scaled   = scaler.transform(X)
-    fraud_prob = float(lr.predict_proba(X_scaled)[0][1])
 
+def _build_score_response(txn: TransactionRequest, vec: np.ndarray, user_baseline: dict,
+                          anomaly_score: float, fraud_prob: float, flags_mask: int) -> dict:
+    """Build the /score payload (shaped like ScoreResponse)."""
     risk_score = round(0.6 * anomaly_score + 0.4 * fraud_prob, 4)
 
     if risk_score >= 0.75:
@@ -262,32 +479,21 @@ def score_transaction(txn: TransactionRequest) -> ScoreResponse:
     else:
         risk_level = "LOW"
 
-    flags = []
     baseline = user_baseline
     mean_amt = baseline["mean_amount"]
+    amount_ratio = vec[I_AMOUNT_RATIO]
 
-    if feature_row["amount_ratio"] > 3:
-        flags.append(RiskFlag(flag="LARGE_AMOUNT", description=f"Transaction is {feature_row['amount_ratio']:.1f}x your usual spending (avg: ${mean_amt:.0f})", severity="high"))
-    elif feature_row["amount_ratio"] > 1.5:
-        flags.append(RiskFlag(flag="ABOVE_AVERAGE_AMOUNT", description=f"Transaction is {feature_row['amount_ratio']:.1f}x your usual spending", severity="medium"))
-    if feature_row["is_new_merchant"]:
-        flags.append(RiskFlag(flag="NEW_MERCHANT", description=f"First transaction with '{txn.merchant}'", severity="medium"))
-    if feature_row["is_high_risk_mcc"]:
-        mcc_names = {"6051": "Gift Cards/Cryptocurrency", "7995": "Gambling", "6012": "Unusual Financial Transfer", "4814": "Telecom (scam-associated)"}
-        flags.append(RiskFlag(flag="HIGH_RISK_CATEGORY", description=f"Merchant category: {mcc_names.get(txn.mcc, 'High-risk category')} — frequently used in scams targeting seniors", severity="high"))
-    if feature_row["is_new_city"]:
-        flags.append(RiskFlag(flag="NEW_LOCATION", description=f"Transaction in '{txn.city}' — not in your usual locations", severity="high"))
-    if feature_row["is_unusual_hour"]:
-        hour = pd.to_datetime(txn.timestamp).hour
-        flags.append(RiskFlag(flag="UNUSUAL_TIME", description=f"Transaction at {hour}:00 AM — outside your normal activity hours", severity="medium"))
-    if feature_row["velocity_1h"] >= 3:
-        flags.append(RiskFlag(flag="HIGH_VELOCITY", description=f"{feature_row['velocity_1h']} transactions in the last hour", severity="high"))
-
-    triggered_features = {col: float(feature_row[col]) for col in FEATURE_COLUMNS if feature_row[col] != 0}
+    flags = [
+        RiskFlag(flag=flag, description=describe(vec, txn, baseline), severity=severity)
+        for bit, flag, severity, describe in FLAG_TABLE
+        if flags_mask & bit
+    ]
+
+    triggered_features = {col: val for col, val in zip(FEATURE_COLUMNS, vec.tolist()) if val != 0}
 
     gemini_context = {
         "transaction": {"merchant": txn.merchant, "amount": txn.amount, "city": txn.city, "timestamp": txn.timestamp, "mcc": txn.mcc},
-        "user_baseline": {"average_spend": round(mean_amt, 2), "amount_ratio": round(float(feature_row["amount_ratio"]), 2), "total_past_txns": baseline.get("total_txns", 0)},
+        "user_baseline": {"average_spend": round(mean_amt, 2), "amount_ratio": round(float(amount_ratio), 2), "total_past_txns": baseline.get("total_txns", 0)},
         "risk": {"score": risk_score, "level": risk_level, "flags": [f.flag for f in flags]},
         "prompt_template": (
             f"A transaction was flagged for a senior customer. "
@@ -306,33 +512,34 @@ def score_transaction(txn: TransactionRequest) -> ScoreResponse:
     else:
         recommendation = "Approve — normal spending pattern"
 
-    return ScoreResponse(
-        transaction_id=txn.transaction_id,
-        user_id=txn.user_id,
-        risk_score=risk_score,
-        risk_level=risk_level,
-        anomaly_score=round(anomaly_score, 4),
-        fraud_probability=round(fraud_prob, 4),
-        risk_flags=flags,
-        triggered_features=triggered_features,
-        gemini_prompt_context=gemini_context,
-        recommendation=recommendation,
-        scored_at=datetime.utcnow().isoformat(),
-    )
+    return {
+        "transaction_id":        txn.transaction_id,
+        "user_id":               txn.user_id,
+        "risk_score":            risk_score,
+        "risk_level":            risk_level,
+        "anomaly_score":         round(anomaly_score, 4),
+        "fraud_probability":     round(fraud_prob, 4),
+        "risk_flags":            flags,
+        "triggered_features":    triggered_features,
+        "gemini_prompt_context": gemini_context,
+        "recommendation":        recommendation,
+        "scored_at":             utc_now_iso(),
+    }
 
 
-@app.get("/health")
+@app.get("/health", response_class=PlainTextResponse)
 def health():
-    return {
-        "status": "ok" if iso is not None else "models_not_loaded",
-        "models_loaded": iso is not None,
-        "scam_model_loaded": scam_pipeline is not None,
-        "timestamp": datetime.utcnow().isoformat(),
-    }
+    if iso is None:
+        return PlainTextResponse("models_not_loaded", status_code=503)
+    return PlainTextResponse("ok")
+
+score_batcher = DynBatcher(score_batch, max_batch_size=BATCH_MAX_SIZE, max_delay=BATCH_MAX_DELAY)
 
 @app.post("/score", response_model=ScoreResponse)
-def score(txn: TransactionRequest):
-    return score_transaction(txn)
+async def score(txn: TransactionRequest):
+    if iso is None:
+        raise HTTPException(status_code=503, detail="Models not loaded. Run training first.")
+    return ORJSONResponse(await score_batcher.process_batched(txn))
 
 @app.get("/model-info")
 def model_info():
@@ -346,18 +553,10 @@ def model_info():
 
 @app.get("/users/{user_id}/baseline")
 def get_user_baseline(user_id: str):
-    baseline = baselines.get(user_id)
-    if not baseline:
+    summary = BASELINE_SUMMARIES.get(user_id)
+    if not summary:
         raise HTTPException(status_code=404, detail=f"No baseline found for user {user_id}")
-    return {
-        "user_id": user_id,
-        "mean_amount":  round(baseline["mean_amount"], 2),
-        "std_amount":   round(baseline["std_amount"], 2),
-        "p95_amount":   round(baseline["p95_amount"], 2),
-        "known_cities": list(baseline["known_cities"]),
-        "known_mccs":   list(baseline["known_mccs"]),
-        "total_txns":   baseline["total_txns"],
-    }
+    return ORJSONResponse(summary)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""
+SafePay Family - Dynamic Request Batching
+Groups concurrent API requests into a single model call.
+
+scikit-learn predicts a batch of N rows far faster than N single-row calls,
+so requests arriving within `max_delay` seconds of each other are queued and
+handed to a batch function together (up to `max_batch_size` at a time).
+"""
+
+import asyncio
+from typing import Any, Callable, List, Optional
+
+
+class DynBatcher:
+    """
+    Collects items submitted via `process_batched` and runs them through
+    `batch_fn(items) -> results` in a worker thread.
+
+    `batch_fn` must return one result per item, in order. A result that is an
+    Exception instance is raised to that item's caller only, so one bad
+    request does not fail the rest of its batch.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 32, max_delay: float = 0.01):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def process_batched(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch."""
+        if self._worker is None:
+            raise RuntimeError("DynBatcher.start() has not been called")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Any failure here fails only this batch's callers; the worker must
+            # keep running or every later process_batched() call would hang
+            try:
+                results = await asyncio.to_thread(self.batch_fn, [item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} items")
+                for (_, future), result in zip(batch, results):
+                    if future.done():  # caller went away (e.g. client disconnect)
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()  # no-op on futures already resolved
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
@@ -9,9 +9,14 @@ Features are designed around senior behavioral patterns:
 - How fast they're spending
 """
 
+import os
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from pandas.api.types import is_datetime64_any_dtype
+
+from jit import njit
 
 
 # MCCs considered high-risk for seniors
@@ -20,6 +25,34 @@ HIGH_RISK_MCCS = {"6051", "7995", "6012", "4814", "6010", "6011"}
 # MCCs seniors commonly use (low suspicion)
 NORMAL_SENIOR_MCCS = {"5411", "5912", "5812", "4111", "7011", "5311", "5541", "8011"}
 
+# MCCs are 4-digit codes (0000–9999) → a 10000-bit mask packed into uint64 words
+MCC_MASK_WORDS = 10000 // 64 + 1
+
+# Per-user numeric baseline for engineer_features_nb(); mean_amount is NaN when unknown
+BASELINE_STATS_DTYPE = np.dtype([
+    ("mean_amount",    np.float64),
+    ("std_amount",     np.float64),
+    ("p95_amount",     np.float64),
+    ("hour_probs",     np.float64, 24),
+    ("known_mcc_mask", np.uint64, MCC_MASK_WORDS),
+])
+
+# datetime.toordinal() of 1970-01-01
+EPOCH_ORDINAL = 719163
+
+
+def hour_histogram(normal_hours) -> np.ndarray:
+    """
+    A baseline's "normal_hours" as an int32[24] count per hour. Accepts the
+    array itself or the {hour: count} dict stored by older baselines.
+    """
+    if isinstance(normal_hours, dict):
+        hist = np.zeros(24, dtype=np.int32)
+        for hour, count in normal_hours.items():
+            hist[int(hour)] = count
+        return hist
+    return np.asarray(normal_hours, dtype=np.int32)
+
 
 def build_user_baselines(df: pd.DataFrame) -> dict:
     """
@@ -28,10 +61,10 @@ def build_user_baselines(df: pd.DataFrame) -> dict:
     """
     baselines = {}
 
-    df = df.copy()
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    if not is_datetime64_any_dtype(df["timestamp"]):
+        df = df.assign(timestamp=pd.to_datetime(df["timestamp"]))
 
-    for user_id, user_df in df.groupby("user_id"):
+    for user_id, user_df in df.groupby("user_id", observed=True):  # skip unused categories
         # Only use non-fraud labeled data for baseline (or all if no labels)
         if "is_fraud" in user_df.columns:
             baseline_df = user_df[user_df["is_fraud"] == 0]
@@ -50,153 +83,561 @@ def build_user_baselines(df: pd.DataFrame) -> dict:
             "known_merchants": set(baseline_df["merchant"].unique()),
             "known_mccs":      set(baseline_df["mcc"].unique()),
             "known_cities":    set(baseline_df["city"].unique()),
-            "normal_hours":    baseline_df["timestamp"].dt.hour.value_counts().to_dict(),
+            "normal_hours":    np.bincount(baseline_df["timestamp"].dt.hour, minlength=24).astype(np.int32),
             "total_txns":      len(baseline_df),
         }
 
     return baselines
 
 
+# Baselines on disk: per-user stats, long-form (user_id, field, value) sets and hour counts
+BASELINE_FILES = {
+    "stats":  "baselines.parquet",
+    "values": "baseline_values.parquet",
+    "hours":  "baseline_hours.parquet",
+}
+BASELINE_STAT_FIELDS = ("mean_amount", "std_amount", "median_amount", "p95_amount", "total_txns")
+BASELINE_SET_FIELDS  = ("known_merchants", "known_mccs", "known_cities")
+
+
+def save_baselines(baselines: dict, model_dir: str):
+    """Write build_user_baselines() output as the Parquet tables in BASELINE_FILES."""
+    stats = pd.DataFrame(
+        [(user_id, *(b[f] for f in BASELINE_STAT_FIELDS)) for user_id, b in baselines.items()],
+        columns=["user_id", *BASELINE_STAT_FIELDS],
+    )
+    values = pd.DataFrame(
+        [(user_id, f, str(v)) for user_id, b in baselines.items() for f in BASELINE_SET_FIELDS for v in b[f]],
+        columns=["user_id", "field", "value"],
+    )
+    hours = pd.DataFrame(
+        [(user_id, h, int(c)) for user_id, b in baselines.items()
+         for h, c in enumerate(hour_histogram(b["normal_hours"])) if c],
+        columns=["user_id", "hour", "count"],
+    )
+    for name, frame in (("stats", stats), ("values", values), ("hours", hours)):
+        frame.to_parquet(os.path.join(model_dir, BASELINE_FILES[name]), compression="zstd", index=False)
+
+
+def load_baselines(model_dir: str) -> dict:
+    """Read save_baselines() output back into the build_user_baselines() dict (MCCs as str)."""
+    def read(name):
+        return pd.read_parquet(os.path.join(model_dir, BASELINE_FILES[name]))
+
+    stats = read("stats")
+    baselines = {
+        user_id: {
+            **dict(zip(BASELINE_STAT_FIELDS, row)),
+            **{f: set() for f in BASELINE_SET_FIELDS},
+            "normal_hours": np.zeros(24, dtype=np.int32),
+        }
+        for user_id, *row in stats[["user_id", *BASELINE_STAT_FIELDS]].itertuples(index=False, name=None)
+    }
+    for (user_id, field), group in read("values").groupby(["user_id", "field"], sort=False)["value"]:
+        baselines[user_id][field] = set(group)
+    hours = read("hours")
+    for user_id, hour, count in hours[["user_id", "hour", "count"]].itertuples(index=False, name=None):
+        baselines[user_id]["normal_hours"][hour] = count
+    return baselines
+
+
+def mcc_code(mcc) -> int:
+    """
+    Integer MCC for bitmask lookups, or -1 unless it is a 4-digit code like
+    "6051". Every MCC lookup on the live path goes through this, so the
+    Python and Numba paths agree on malformed codes (" 5411", "541").
+    """
+    mcc = str(mcc)
+    return int(mcc) if len(mcc) == 4 and mcc.isascii() and mcc.isdigit() else -1
+
+
+def mcc_bitmask(mccs) -> np.ndarray:
+    """Pack a collection of MCC codes (str or int) into a uint64 bitset; malformed codes are left out."""
+    mask = np.zeros(MCC_MASK_WORDS, dtype=np.uint64)
+    for mcc in mccs:
+        code = mcc_code(mcc)
+        if code >= 0:
+            mask[code >> 6] |= np.uint64(1 << (code & 63))
+    return mask
+
+
+def mcc_in_mask(mcc, mask: np.ndarray) -> bool:
+    """Membership test against mcc_bitmask(): one shift + AND."""
+    code = mcc_code(mcc)
+    if code < 0:
+        return False
+    return bool((int(mask[code >> 6]) >> (code & 63)) & 1)
+
+
+def compact_baseline(baseline: dict) -> dict:
+    """
+    Convert a baseline from build_user_baselines() into the lookup-friendly
+    form used for live scoring: interned frozensets for merchants/cities, an
+    MCC bitmask ("known_mcc_mask") and "normal_hours" as an hour histogram.
+    The original keys are kept.
+    """
+    compact = dict(baseline)
+    compact["normal_hours"]    = hour_histogram(baseline.get("normal_hours", {}))
+    compact["known_merchants"] = frozenset(sys.intern(str(m)) for m in baseline.get("known_merchants", ()))
+    compact["known_cities"]    = frozenset(sys.intern(str(c)) for c in baseline.get("known_cities", ()))
+    compact["known_mcc_mask"]  = mcc_bitmask(baseline.get("known_mccs", ()))
+    return compact
+
+
+def _category_isin(col: pd.Series, values) -> np.ndarray:
+    """int8 membership flags for a categorical column, tested once per category."""
+    hits = np.append(col.cat.categories.isin(values), False)  # code -1 (missing) → False
+    return hits[col.cat.codes.to_numpy()].astype(np.int8)
+
+
+def baseline_arrays(baselines: dict, users) -> dict:
+    """
+    Baselines as arrays indexed by user code (position in `users`), for
+    gathering with category codes. The extra last row holds the defaults used
+    for users without a baseline (and for code -1): NaN mean (= use the txn
+    amount), std 1.0, p95 inf and an empty (n + 1, 24) hour histogram.
+    """
+    n = len(users)
+    arrays = {
+        "mean_amount": np.full(n + 1, np.nan),
+        "std_amount":  np.ones(n + 1),
+        "p95_amount":  np.full(n + 1, np.inf),
+        "hour_hist":   np.zeros((n + 1, 24), dtype=np.int32),
+    }
+    for code, user_id in enumerate(users):
+        b = baselines.get(user_id)
+        if b is None:
+            continue
+        arrays["mean_amount"][code] = b.get("mean_amount", np.nan)
+        arrays["std_amount"][code]  = b.get("std_amount", 1.0)
+        arrays["p95_amount"][code]  = b.get("p95_amount", np.inf)
+        arrays["hour_hist"][code]   = hour_histogram(b.get("normal_hours", {}))
+    return arrays
+
+
+WINDOW_7D_NS = 7 * 86400 * 10**9
+WINDOW_1H_NS = 3600 * 10**9
+
+
+@njit(cache=True)
+def history_features(user, ts, amount, mcc, merchant, city, in_baseline, n_mcc, n_merchant, n_city):
+    """
+    One sweep over transactions sorted by (user, ts) computing the look-back
+    features from int codes (-1 = missing): rolling 7d spend/count, 1h velocity,
+    MCC frequency and the first-occurrence "new" flags. Only strictly earlier
+    txns of the same user count, so same-timestamp txns don't see each other.
+    The "new" flags only count earlier rows with in_baseline set, the rows
+    build_user_baselines() would put in the user's known sets.
+    """
+    n = ts.shape[0]
+    rolling_7d_total = np.zeros(n)
+    rolling_7d_count = np.zeros(n, dtype=np.int32)
+    velocity_1h      = np.zeros(n, dtype=np.int32)
+    mcc_freq_score   = np.zeros(n)
+    is_new_merchant  = np.zeros(n, dtype=np.int8)
+    is_new_mcc       = np.zeros(n, dtype=np.int8)
+    is_new_city      = np.zeros(n, dtype=np.int8)
+
+    # Per-user prior counts by code; the last slot holds missing values
+    mcc_seen      = np.zeros(n_mcc + 1, dtype=np.int64)
+    merchant_seen = np.zeros(n_merchant + 1, dtype=np.int64)
+    city_seen     = np.zeros(n_city + 1, dtype=np.int64)
+    # Same, restricted to baseline rows, for the "new" flags
+    mcc_known      = np.zeros(n_mcc + 1, dtype=np.int64)
+    merchant_known = np.zeros(n_merchant + 1, dtype=np.int64)
+    city_known     = np.zeros(n_city + 1, dtype=np.int64)
+
+    user_start = 0
+    head_7d = 0
+    head_1h = 0
+    sum_7d = 0.0
+    block = 0
+    while block < n:
+        # Rows [block, block_end) share one user and timestamp
+        block_end = block + 1
+        while block_end < n and user[block_end] == user[block] and ts[block_end] == ts[block]:
+            block_end += 1
+
+        if block == 0 or user[block] != user[block - 1]:
+            for i in range(user_start, block):  # reset only what the last user touched
+                mcc_seen[mcc[i]] = 0
+                merchant_seen[merchant[i]] = 0
+                city_seen[city[i]] = 0
+                mcc_known[mcc[i]] = 0
+                merchant_known[merchant[i]] = 0
+                city_known[city[i]] = 0
+            user_start = head_7d = head_1h = block
+            sum_7d = 0.0
+
+        # Windows are [t - w, t): add earlier blocks' amounts, drop expired rows
+        t = ts[block]
+        while head_7d < block and ts[head_7d] < t - WINDOW_7D_NS:
+            sum_7d -= amount[head_7d]
+            head_7d += 1
+        while head_1h < block and ts[head_1h] < t - WINDOW_1H_NS:
+            head_1h += 1
+        prior_total = block - user_start
+
+        for i in range(block, block_end):
+            rolling_7d_total[i] = sum_7d if block > head_7d else 0.0
+            rolling_7d_count[i] = block - head_7d
+            velocity_1h[i]      = block - head_1h
+            if prior_total > 0:
+                mcc_freq_score[i] = mcc_seen[mcc[i]] / prior_total
+            is_new_mcc[i]      = 1 if mcc_known[mcc[i]] == 0 else 0
+            is_new_merchant[i] = 1 if merchant_known[merchant[i]] == 0 else 0
+            is_new_city[i]     = 1 if city_known[city[i]] == 0 else 0
+
+        for i in range(block, block_end):
+            sum_7d += amount[i]
+            mcc_seen[mcc[i]] += 1
+            merchant_seen[merchant[i]] += 1
+            city_seen[city[i]] += 1
+            if in_baseline[i]:
+                mcc_known[mcc[i]] += 1
+                merchant_known[merchant[i]] += 1
+                city_known[city[i]] += 1
+        block = block_end
+
+    return (rolling_7d_total, rolling_7d_count, velocity_1h, mcc_freq_score,
+            is_new_merchant, is_new_mcc, is_new_city)
+
+
 def engineer_features(df: pd.DataFrame, baselines: dict = None) -> pd.DataFrame:
     """
     Main feature engineering function.
     Takes raw transaction DataFrame, returns feature matrix.
+    Features are computed column-wise, except the look-back features (rolling 7d,
+    1h velocity, MCC frequency, new merchant/MCC/city), which come from one
+    history_features() sweep and only count earlier transactions of the same user.
+    Feature columns use fixed compact dtypes: int8 flags, float32 continuous values.
     """
-    df = df.copy()
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df = df.sort_values(["user_id", "timestamp"]).reset_index(drop=True)
-
     # Build baselines if not provided
     if baselines is None:
         baselines = build_user_baselines(df)
 
-    features = []
-
-    for idx, row in df.iterrows():
-        user_id = row["user_id"]
-        baseline = baselines.get(user_id, {})
-
-        # --- Amount Features ---
-        mean_amt = baseline.get("mean_amount", row["amount"])
-        std_amt  = baseline.get("std_amount", 1.0)
-
-        amount_ratio  = row["amount"] / mean_amt if mean_amt > 0 else 1.0
-        amount_zscore = (row["amount"] - mean_amt) / std_amt
-
-        is_above_p95  = 1 if row["amount"] > baseline.get("p95_amount", float("inf")) else 0
-
-        # Rolling 7-day spend for this user (look back only)
-        past_7d = df[
-            (df["user_id"] == user_id) &
-            (df["timestamp"] < row["timestamp"]) &
-            (df["timestamp"] >= row["timestamp"] - pd.Timedelta(days=7))
-        ]
-        rolling_7d_total = past_7d["amount"].sum()
-        rolling_7d_count = len(past_7d)
-
-        # --- Merchant / MCC Features ---
-        known_merchants = baseline.get("known_merchants", set())
-        known_mccs      = baseline.get("known_mccs", set())
-
-        is_new_merchant = 0 if row["merchant"] in known_merchants else 1
-        is_new_mcc      = 0 if row["mcc"] in known_mccs else 1
-        is_high_risk_mcc = 1 if row["mcc"] in HIGH_RISK_MCCS else 0
-        is_normal_senior_mcc = 1 if row["mcc"] in NORMAL_SENIOR_MCCS else 0
-
-        # MCC frequency score: how often has user used this MCC?
-        user_mcc_history = df[
-            (df["user_id"] == user_id) &
-            (df["timestamp"] < row["timestamp"])
-        ]["mcc"].value_counts()
-
-        total_past = user_mcc_history.sum()
-        mcc_freq_score = (
-            user_mcc_history.get(row["mcc"], 0) / total_past
-            if total_past > 0 else 0.0
-        )
-
-        # --- Time Features ---
-        hour    = row["timestamp"].hour
-        weekday = row["timestamp"].weekday()  # 0=Monday
-
-        is_weekend      = 1 if weekday >= 5 else 0
-        is_unusual_hour = 1 if hour in range(1, 5) else 0  # 1AM–5AM
-
-        # Is this hour unusual for this specific user?
-        normal_hours = baseline.get("normal_hours", {})
-        total_hour_txns = sum(normal_hours.values()) or 1
-        hour_prob = normal_hours.get(hour, 0) / total_hour_txns
-        is_unusual_for_user = 1 if hour_prob < 0.02 else 0
-
-        # Transaction velocity: how many txns in last 1 hour?
-        last_1h = df[
-            (df["user_id"] == user_id) &
-            (df["timestamp"] < row["timestamp"]) &
-            (df["timestamp"] >= row["timestamp"] - pd.Timedelta(hours=1))
-        ]
-        velocity_1h = len(last_1h)
-
-        # --- Location Features ---
-        known_cities = baseline.get("known_cities", set())
-        is_new_city  = 0 if row["city"] in known_cities else 1
-
-        # --- Combined Risk Signals ---
-        # Multiple risk flags at once is a strong signal
-        risk_signal_count = (
-            is_new_merchant +
-            is_new_mcc +
-            is_high_risk_mcc +
-            is_unusual_hour +
-            is_new_city +
-            is_above_p95
-        )
-
-        features.append({
-            # Identifiers (not used in model)
-            "transaction_id":      row["transaction_id"],
-            "user_id":             user_id,
-            "timestamp":           row["timestamp"],
-            "amount":              row["amount"],
-            "merchant":            row["merchant"],
-            "mcc":                 row["mcc"],
-            "city":                row["city"],
-
-            # Amount features
-            "amount_ratio":        round(amount_ratio, 4),
-            "amount_zscore":       round(amount_zscore, 4),
-            "is_above_p95":        is_above_p95,
-            "rolling_7d_total":    round(rolling_7d_total, 2),
-            "rolling_7d_count":    rolling_7d_count,
-
-            # Merchant/MCC features
-            "is_new_merchant":     is_new_merchant,
-            "is_new_mcc":          is_new_mcc,
-            "is_high_risk_mcc":    is_high_risk_mcc,
-            "is_normal_senior_mcc": is_normal_senior_mcc,
-            "mcc_freq_score":      round(mcc_freq_score, 4),
-
-            # Time features
-            "hour_of_day":         hour,
-            "is_weekend":          is_weekend,
-            "is_unusual_hour":     is_unusual_hour,
-            "is_unusual_for_user": is_unusual_for_user,
-            "velocity_1h":         velocity_1h,
-
-            # Location features
-            "is_new_city":         is_new_city,
-
-            # Combined signals
-            "risk_signal_count":   risk_signal_count,
-
-            # Label (if available)
-            **({"is_fraud": row["is_fraud"]} if "is_fraud" in row else {}),
-        })
-
-    feature_df = pd.DataFrame(features)
+    # assign/sort_values return new frames, so the caller's df is never modified
+    if not is_datetime64_any_dtype(df["timestamp"]):
+        df = df.assign(timestamp=pd.to_datetime(df["timestamp"]))
+    df = df.sort_values(["user_id", "timestamp"]).reset_index(drop=True)
+
+    # Short repeated strings → categories, so groupby/isin work on int codes
+    for col in ("user_id", "merchant", "mcc", "city"):
+        df[col] = df[col].astype("category")
+
+    codes  = {col: df[col].cat.codes.to_numpy() for col in ("user_id", "merchant", "mcc", "city")}
+    amount = df["amount"]
+
+    # Per-user baseline stats, gathered by user code
+    stats = baseline_arrays(baselines, df["user_id"].cat.categories)
+    user_code = codes["user_id"]
+
+    # --- Amount Features ---
+    mean_amt = pd.Series(stats["mean_amount"][user_code], index=df.index).fillna(amount)
+    std_amt  = stats["std_amount"][user_code]
+    p95_amt  = stats["p95_amount"][user_code]
+
+    amount_ratio  = (amount / mean_amt).where(mean_amt > 0, 1.0)
+    amount_zscore = (amount - mean_amt) / std_amt
+    is_above_p95  = (amount > p95_amt).to_numpy(np.int8)
+
+    # --- Look-back Features (one sorted sweep, see history_features) ---
+    # Rolling 7-day spend, 1h velocity, MCC frequency score, and "new"
+    # merchant/MCC/city = no earlier baseline txn of this user with it (not
+    # membership in the baseline sets, which also contain later transactions).
+    # Like build_user_baselines, only non-fraud rows count as seen, or all rows
+    # for a user without any, so fraud rows aren't flagged differently than live.
+    if "is_fraud" in df.columns:
+        legit = pd.Series(df["is_fraud"].to_numpy() == 0)
+        in_baseline = (legit | ~legit.groupby(user_code).transform("any")).to_numpy(np.int8)
+    else:
+        in_baseline = np.ones(len(df), dtype=np.int8)
+    (rolling_7d_total, rolling_7d_count, velocity_1h, mcc_freq_score,
+     is_new_merchant, is_new_mcc, is_new_city) = history_features(
+        codes["user_id"],
+        df["timestamp"].to_numpy("datetime64[ns]").view(np.int64),  # ns, whatever the column's unit
+        amount.to_numpy(np.float64),
+        codes["mcc"], codes["merchant"], codes["city"], in_baseline,
+        len(df["mcc"].cat.categories), len(df["merchant"].cat.categories), len(df["city"].cat.categories),
+    )
+
+    # --- Merchant / MCC Features ---
+    is_high_risk_mcc     = _category_isin(df["mcc"], HIGH_RISK_MCCS)
+    is_normal_senior_mcc = _category_isin(df["mcc"], NORMAL_SENIOR_MCCS)
+
+    # --- Time Features ---
+    hour    = df["timestamp"].dt.hour
+    weekday = df["timestamp"].dt.weekday  # 0=Monday
+
+    is_weekend      = (weekday >= 5).to_numpy(np.int8)
+    is_unusual_hour = hour.between(1, 4).to_numpy(np.int8)  # 1AM–5AM
+
+    # Is this hour unusual for this specific user?
+    hour_totals = np.maximum(stats["hour_hist"].sum(axis=1), 1)
+    hour_prob = stats["hour_hist"][user_code, hour.to_numpy()] / hour_totals[user_code]
+    is_unusual_for_user = (hour_prob < 0.02).astype(np.int8)
+
+    # --- Combined Risk Signals ---
+    # Multiple risk flags at once is a strong signal
+    risk_signal_count = (
+        is_new_merchant +
+        is_new_mcc +
+        is_high_risk_mcc +
+        is_unusual_hour +
+        is_new_city +
+        is_above_p95
+    )
+
+    feature_df = pd.DataFrame({
+        # Identifiers (not used in model)
+        "transaction_id":      df["transaction_id"],
+        "user_id":             df["user_id"],
+        "timestamp":           df["timestamp"],
+        "amount":              amount,
+        "merchant":            df["merchant"],
+        "mcc":                 df["mcc"],
+        "city":                df["city"],
+
+        # Amount features
+        "amount_ratio":        amount_ratio.round(4).to_numpy(np.float32),
+        "amount_zscore":       amount_zscore.round(4).to_numpy(np.float32),
+        "is_above_p95":        is_above_p95,
+        "rolling_7d_total":    rolling_7d_total.round(2).astype(np.float32),
+        "rolling_7d_count":    rolling_7d_count,
+
+        # Merchant/MCC features
+        "is_new_merchant":     is_new_merchant,
+        "is_new_mcc":          is_new_mcc,
+        "is_high_risk_mcc":    is_high_risk_mcc,
+        "is_normal_senior_mcc": is_normal_senior_mcc,
+        "mcc_freq_score":      mcc_freq_score.round(4).astype(np.float32),
+
+        # Time features
+        "hour_of_day":         hour.to_numpy(np.int8),
+        "is_weekend":          is_weekend,
+        "is_unusual_hour":     is_unusual_hour,
+        "is_unusual_for_user": is_unusual_for_user,
+        "velocity_1h":         velocity_1h,
+
+        # Location features
+        "is_new_city":         is_new_city,
+
+        # Combined signals
+        "risk_signal_count":   risk_signal_count,
+
+        # Label (if available)
+        **({"is_fraud": df["is_fraud"]} if "is_fraud" in df.columns else {}),
+    }, copy=False)
+
     print(f"✅ Engineered {len(feature_df)} feature rows with {len(FEATURE_COLUMNS)} ML features")
     return feature_df
 
 
+def parse_timestamp(value: str) -> datetime:
+    """ISO 8601 string → datetime, also accepting a trailing "Z" (JS toISOString()), which Python < 3.11 rejects."""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+def engineer_features_single(txn: dict, baseline: dict) -> np.ndarray:
+    """
+    Fast path for scoring one live transaction (no pandas).
+    Returns a float64 vector ordered like FEATURE_COLUMNS. The "new"
+    merchant/MCC/city flags are membership tests against the stored baseline
+    (built from the user's non-fraud history), which is what engineer_features()
+    flags for a txn whose earlier non-fraud txns are that history; the
+    look-back features are zero since the live txn comes without its history.
+    """
+    amount = txn["amount"]
+    timestamp = txn["timestamp"]
+    if isinstance(timestamp, str):
+        timestamp = parse_timestamp(timestamp)
+
+    # --- Amount Features ---
+    mean_amt = baseline.get("mean_amount", amount)
+    std_amt  = baseline.get("std_amount", 1.0)
+
+    amount_ratio  = amount / mean_amt if mean_amt > 0 else 1.0
+    amount_zscore = (amount - mean_amt) / std_amt
+    is_above_p95  = 1 if amount > baseline.get("p95_amount", float("inf")) else 0
+
+    # --- Merchant / MCC Features ---
+    is_new_merchant = 0 if txn["merchant"] in baseline.get("known_merchants", set()) else 1
+    mcc_mask = baseline.get("known_mcc_mask")
+    if mcc_mask is None:
+        mcc_mask = mcc_bitmask(baseline.get("known_mccs", ()))
+    is_new_mcc = 0 if mcc_in_mask(txn["mcc"], mcc_mask) else 1
+    is_high_risk_mcc = 1 if mcc_in_mask(txn["mcc"], HIGH_RISK_MCC_MASK) else 0
+    is_normal_senior_mcc = 1 if mcc_in_mask(txn["mcc"], NORMAL_SENIOR_MCC_MASK) else 0
+
+    # --- Time Features ---
+    hour = timestamp.hour
+    is_weekend      = 1 if timestamp.weekday() >= 5 else 0
+    is_unusual_hour = 1 if 1 <= hour < 5 else 0
+
+    hour_hist = hour_histogram(baseline.get("normal_hours", {}))
+    hour_prob = hour_hist[hour] / max(int(hour_hist.sum()), 1)
+    is_unusual_for_user = 1 if hour_prob < 0.02 else 0
+
+    # --- Location Features ---
+    is_new_city = 0 if txn["city"] in baseline.get("known_cities", set()) else 1
+
+    risk_signal_count = (
+        is_new_merchant + is_new_mcc + is_high_risk_mcc +
+        is_unusual_hour + is_new_city + is_above_p95
+    )
+
+    # A lone live transaction has no in-batch history, so the look-back
+    # features (rolling 7d, MCC frequency, 1h velocity) are all zero.
+    vec = np.zeros(len(FEATURE_COLUMNS))
+    vec[LIVE_FEATURE_INDEX] = (
+        round(amount_ratio, 4),
+        round(amount_zscore, 4),
+        is_above_p95,
+        is_new_merchant,
+        is_new_mcc,
+        is_high_risk_mcc,
+        is_normal_senior_mcc,
+        hour,
+        is_weekend,
+        is_unusual_hour,
+        is_unusual_for_user,
+        is_new_city,
+        risk_signal_count,
+    )
+    return vec
+
+
+def wall_clock_epoch(timestamp) -> int:
+    """Seconds since 1970-01-01 of the timestamp's wall-clock fields (its own timezone, if any)."""
+    if isinstance(timestamp, str):
+        timestamp = parse_timestamp(timestamp)
+    return ((timestamp.toordinal() - EPOCH_ORDINAL) * 86400 +
+            timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second)
+
+
+def string_hashes(values) -> np.ndarray:
+    """Sorted int64 hashes of strings, for searchsorted membership tests in Numba."""
+    return np.unique(np.array([hash(str(v)) for v in values], dtype=np.int64))
+
+
+def numba_baseline(baseline: dict) -> tuple:
+    """
+    Pack a baseline dict into the (stats, merchant_hashes, city_hashes) tuple
+    taken by engineer_features_nb(). Build once per user at load time.
+    """
+    stats = np.zeros(1, dtype=BASELINE_STATS_DTYPE)
+    stats["mean_amount"] = baseline.get("mean_amount", np.nan)
+    stats["std_amount"]  = baseline.get("std_amount", 1.0)
+    stats["p95_amount"]  = baseline.get("p95_amount", np.inf)
+
+    hour_hist = hour_histogram(baseline.get("normal_hours", {}))
+    stats["hour_probs"][0] = hour_hist / max(int(hour_hist.sum()), 1)
+
+    mcc_mask = baseline.get("known_mcc_mask")
+    stats["known_mcc_mask"] = mcc_mask if mcc_mask is not None else mcc_bitmask(baseline.get("known_mccs", ()))
+
+    return (
+        stats,
+        string_hashes(baseline.get("known_merchants", ())),
+        string_hashes(baseline.get("known_cities", ())),
+    )
+
+
+HIGH_RISK_MCC_MASK      = mcc_bitmask(HIGH_RISK_MCCS)
+NORMAL_SENIOR_MCC_MASK  = mcc_bitmask(NORMAL_SENIOR_MCCS)
+
+
+@njit(cache=True)
+def _mask_has(mask, code):
+    if code < 0:
+        return 0
+    return int((mask[code >> 6] >> np.uint64(code & 63)) & np.uint64(1))
+
+
+@njit(cache=True)
+def _sorted_has(hashes, h):
+    i = np.searchsorted(hashes, h)
+    return 1 if i < hashes.shape[0] and hashes[i] == h else 0
+
+
+@njit(cache=True)
+def engineer_features_nb(amount, mcc_int, ts_epoch, city_hash, merchant_hash, baseline_struct,
+                         high_risk_mask, normal_senior_mask, live_index, n_features):
+    """
+    Compiled engineer_features_single(): the FEATURE_COLUMNS vector for one
+    live transaction from pre-hashed/pre-parsed inputs (see engineer_features_compiled).
+    The LIVE_FEATURE_COLUMNS values are written at positions live_index.
+    """
+    stats, merchant_hashes, city_hashes = baseline_struct
+    b = stats[0]
+
+    # --- Amount Features ---
+    mean_amt = b["mean_amount"]
+    if np.isnan(mean_amt):
+        mean_amt = amount
+    amount_ratio  = amount / mean_amt if mean_amt > 0 else 1.0
+    amount_zscore = (amount - mean_amt) / b["std_amount"]
+    is_above_p95  = 1 if amount > b["p95_amount"] else 0
+
+    # --- Merchant / MCC Features ---
+    is_new_merchant      = 1 - _sorted_has(merchant_hashes, merchant_hash)
+    is_new_mcc           = 1 - _mask_has(b["known_mcc_mask"], mcc_int)
+    is_high_risk_mcc     = _mask_has(high_risk_mask, mcc_int)
+    is_normal_senior_mcc = _mask_has(normal_senior_mask, mcc_int)
+
+    # --- Time Features (1970-01-01 was a Thursday, weekday 3) ---
+    hour    = (ts_epoch // 3600) % 24
+    weekday = (ts_epoch // 86400 + 3) % 7
+    is_weekend          = 1 if weekday >= 5 else 0
+    is_unusual_hour     = 1 if 1 <= hour < 5 else 0
+    is_unusual_for_user = 1 if b["hour_probs"][hour] < 0.02 else 0
+
+    # --- Location Features ---
+    is_new_city = 1 - _sorted_has(city_hashes, city_hash)
+
+    risk_signal_count = (
+        is_new_merchant + is_new_mcc + is_high_risk_mcc +
+        is_unusual_hour + is_new_city + is_above_p95
+    )
+
+    # rolling_7d_*, mcc_freq_score, velocity_1h stay 0 (no look-back for a live txn)
+    out = np.zeros(n_features)
+    out[live_index] = np.array([
+        round(amount_ratio, 4),
+        round(amount_zscore, 4),
+        float(is_above_p95),
+        float(is_new_merchant),
+        float(is_new_mcc),
+        float(is_high_risk_mcc),
+        float(is_normal_senior_mcc),
+        float(hour),
+        float(is_weekend),
+        float(is_unusual_hour),
+        float(is_unusual_for_user),
+        float(is_new_city),
+        float(risk_signal_count),
+    ])
+    return out
+
+
+def engineer_features_compiled(txn: dict, nb_baseline: tuple) -> np.ndarray:
+    """engineer_features_single() via the Numba kernel; nb_baseline comes from numba_baseline()."""
+    return engineer_features_nb(
+        float(txn["amount"]),
+        mcc_code(txn["mcc"]),
+        wall_clock_epoch(txn["timestamp"]),
+        hash(str(txn["city"])),
+        hash(str(txn["merchant"])),
+        nb_baseline,
+        HIGH_RISK_MCC_MASK,
+        NORMAL_SENIOR_MCC_MASK,
+        LIVE_FEATURE_INDEX,
+        len(FEATURE_COLUMNS),
+    )
+
+
 # Columns used for ML model training (exclude identifiers and label)
 FEATURE_COLUMNS = [
     "amount_ratio",
@@ -217,6 +658,26 @@ FEATURE_COLUMNS = [
     "is_new_city",
     "risk_signal_count",
 ]
+FEATURE_INDEX = {col: i for i, col in enumerate(FEATURE_COLUMNS)}
+
+# Features computed for a lone live transaction, in the order engineer_features_single()
+# and engineer_features_nb() produce them; the look-back features stay 0
+LIVE_FEATURE_COLUMNS = (
+    "amount_ratio",
+    "amount_zscore",
+    "is_above_p95",
+    "is_new_merchant",
+    "is_new_mcc",
+    "is_high_risk_mcc",
+    "is_normal_senior_mcc",
+    "hour_of_day",
+    "is_weekend",
+    "is_unusual_hour",
+    "is_unusual_for_user",
+    "is_new_city",
+    "risk_signal_count",
+)
+LIVE_FEATURE_INDEX = np.array([FEATURE_INDEX[col] for col in LIVE_FEATURE_COLUMNS], dtype=np.int64)
 
 
 if __name__ == "__main__":
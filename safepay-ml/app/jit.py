@@ -0,0 +1,18 @@
+"""
+SafePay Family - Optional Numba JIT
+`njit` compiles hot numeric kernels with Numba when it is installed and
+leaves them as plain Python otherwise, so every module still imports
+without it.
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports both @njit and @njit(...))."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
@@ -1,19 +1,34 @@
 """
 SafePay Family - Scam Detection Model
 Detects phishing emails, scam SMS, and suspicious contacts
-using TF-IDF + Logistic Regression.
+using hashed TF-IDF + Logistic Regression.
 
 Place this file at: safepay-ml/app/scam_detector.py
 Run standalone to train: python scam_detector.py
 The model saves to: safepay-ml/models/scam_detector.pkl
 """
 
+import math
 import os
 import re
+from functools import partial
 import joblib
+import numpy as np
+
+try:  # optional: scans every signal pattern in one pass
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:  # optional: one-pass keyword matching when hyperscan isn't available
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from sklearn.linear_model import LogisticRegression
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.pipeline import Pipeline
+from sklearn.utils import murmurhash3_32
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, roc_auc_score
 
@@ -119,6 +134,106 @@ SIGNAL_DESCRIPTIONS = {
 }
 
 
+# ─── Signal Patterns ──────────────────────────────────────────────────────────
+
+SIGNAL_KEYWORDS = {
+    "has_urgency": [
+        "urgent", "immediately", "now", "today", "expires",
+        "final notice", "last chance", "act now",
+    ],
+    "has_prize": [
+        "won", "winner", "congratulations", "prize", "free", "claim", "selected",
+    ],
+    "has_threat": [
+        "arrest", "suspended", "locked", "police", "warrant",
+        "cancelled", "disconnected", "legal action",
+    ],
+    "has_money": [
+        "wire", "gift card", "bitcoin", "crypto", "transfer",
+        "grant", "inheritance", "western union",
+    ],
+    "has_suspicious_tld": [
+        ".xyz", ".info", "-secure", "-verify", "-login",
+        "-alert", "-update", "-confirm", "-billing",
+    ],
+    "has_gov_impersonation": [
+        "irs", "social security", "medicare", "fbi",
+        "government grant", "social security administration",
+    ],
+    "asks_for_credentials": [
+        "password", "ssn", "social security number", "bank account",
+        "credit card", "verify your", "confirm your", "fsa id",
+    ],
+}
+
+TYPOSQUAT_PATTERN = r'paypa[l1]|amaz[o0]n|micros[o0]ft|app[l1]e|g[o0]{2}gle|netfl[i1]x|ba[n]k[o0]famerica'
+
+# One pattern per signal; the signal's position is its bit in the scan bitmask
+SIGNAL_PATTERNS = {
+    name: (TYPOSQUAT_PATTERN if name == "has_typosquat"
+           else "|".join(re.escape(w) for w in SIGNAL_KEYWORDS[name]))
+    for name in SIGNAL_DESCRIPTIONS
+}
+SIGNAL_NAMES = list(SIGNAL_PATTERNS)
+
+
+def _compile_signal_scanner():
+    """
+    Compile all signal patterns once at import: Hyperscan if available, else
+    an Aho-Corasick automaton over the keywords (plus the typosquat regex),
+    else one precompiled regex per signal.
+    """
+    if hyperscan is not None:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode() for p in SIGNAL_PATTERNS.values()],
+            ids=list(range(len(SIGNAL_NAMES))),
+            elements=len(SIGNAL_NAMES),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(SIGNAL_NAMES),
+        )
+
+        def on_match(signal_id, start, end, flags, mask):
+            mask[0] |= 1 << signal_id
+
+        def scan(text_low: str) -> int:
+            mask = [0]
+            db.scan(text_low.encode(), match_event_handler=on_match, context=mask)
+            return mask[0]
+    elif ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for i, name in enumerate(SIGNAL_NAMES):
+            for word in SIGNAL_KEYWORDS.get(name, ()):
+                automaton.add_word(word, automaton.get(word, 0) | (1 << i))
+        automaton.make_automaton()
+        typosquat_bit = 1 << SIGNAL_NAMES.index("has_typosquat")
+        typosquat_re  = re.compile(TYPOSQUAT_PATTERN)
+
+        def scan(text_low: str) -> int:
+            mask = typosquat_bit if typosquat_re.search(text_low) else 0
+            for _, bits in automaton.iter(text_low):
+                mask |= bits
+            return mask
+    else:
+        compiled = [(1 << i, re.compile(p)) for i, p in enumerate(SIGNAL_PATTERNS.values())]
+
+        def scan(text_low: str) -> int:
+            mask = 0
+            for bit, regex in compiled:
+                if regex.search(text_low):
+                    mask |= bit
+            return mask
+
+    return scan
+
+
+scan_signals = _compile_signal_scanner()
+
+
+def unpack_signals(mask: int) -> dict:
+    """Expand a scan_signals() bitmask into {signal_name: 0/1}."""
+    return {name: (mask >> i) & 1 for i, name in enumerate(SIGNAL_NAMES)}
+
+
 # ─── Feature Extraction ───────────────────────────────────────────────────────
 
 def extract_text_features(
@@ -131,6 +246,30 @@ def extract_text_features(
     Combine all inputs into one text blob + return hand-crafted signal flags.
     Returns: (combined_text: str, signals: dict)
     """
+    combined = combine_text(email_address, email_body, sms_content, phone_number)
+    signals = unpack_signals(scan_signals(combined.lower()))
+
+    return combined, signals
+
+
+def extract_text_features_batch(messages: list):
+    """
+    extract_text_features() for many messages (dicts of its keyword arguments).
+    Returns: (texts: list[str], signals: dict of signal name → int8 array)
+    """
+    texts = [combine_text(**m) for m in messages]
+    masks = np.fromiter((scan_signals(t.lower()) for t in texts), dtype=np.int64, count=len(texts))
+    signals = {name: ((masks >> i) & 1).astype(np.int8) for i, name in enumerate(SIGNAL_NAMES)}
+    return texts, signals
+
+
+def combine_text(
+    email_address: str = None,
+    email_body: str = None,
+    sms_content: str = None,
+    phone_number: str = None,
+) -> str:
+    """The text blob the model scores: every provided input, joined."""
     parts = []
     if email_address:
         parts.append(f"emailaddress {email_address} {email_address}")
@@ -141,44 +280,105 @@ def extract_text_features(
     if phone_number:
         parts.append(f"phone {phone_number}")
 
-    combined = " ".join(parts).strip()
-    text_low = combined.lower()
-
-    signals = {
-        "has_urgency": int(any(w in text_low for w in [
-            "urgent", "immediately", "now", "today", "expires",
-            "final notice", "last chance", "act now",
-        ])),
-        "has_prize": int(any(w in text_low for w in [
-            "won", "winner", "congratulations", "prize", "free", "claim", "selected",
-        ])),
-        "has_threat": int(any(w in text_low for w in [
-            "arrest", "suspended", "locked", "police", "warrant",
-            "cancelled", "disconnected", "legal action",
-        ])),
-        "has_money": int(any(w in text_low for w in [
-            "wire", "gift card", "bitcoin", "crypto", "transfer",
-            "grant", "inheritance", "western union",
-        ])),
-        "has_suspicious_tld": int(any(w in text_low for w in [
-            ".xyz", ".info", "-secure", "-verify", "-login",
-            "-alert", "-update", "-confirm", "-billing",
-        ])),
-        "has_typosquat": int(bool(re.search(
-            r'paypa[l1]|amaz[o0]n|micros[o0]ft|app[l1]e|g[o0]{2}gle|netfl[i1]x|ba[n]k[o0]famerica',
-            text_low
-        ))),
-        "has_gov_impersonation": int(any(w in text_low for w in [
-            "irs", "social security", "medicare", "fbi",
-            "government grant", "social security administration",
-        ])),
-        "asks_for_credentials": int(any(w in text_low for w in [
-            "password", "ssn", "social security number", "bank account",
-            "credit card", "verify your", "confirm your", "fsa id",
-        ])),
-    }
+    return " ".join(parts).strip()
 
-    return combined, signals
+
+# ─── Fused Inference ──────────────────────────────────────────────────────────
+
+def hashed_column(term: str, n_features: int) -> int:
+    """Column HashingVectorizer assigns to a term (signed murmurhash3, abs, mod n_features)."""
+    h = murmurhash3_32(term, seed=0)
+    if h == -2**31:  # abs() would overflow int32; sklearn maps it like this
+        return (2**31 - 1 - (n_features - 1)) % n_features
+    return abs(h) % n_features
+
+
+class FusedScamScorer:
+    """
+    Single-pass equivalent of a fitted TF-IDF → LogisticRegression pipeline's
+    predict_proba(texts)[:, 1]. Handles both pipeline shapes:
+      ("hash", HashingVectorizer) → ("tfidf", TfidfTransformer) → ("lr", ...)
+      ("tfidf", TfidfVectorizer) → ("lr", ...)   (models trained before hashing)
+
+    Each column's LR weight is pre-multiplied by its IDF, so a text is scored
+    by one walk over its n-grams (accumulating the dot product and the L2
+    norm together) — no sparse matrix is built.
+    """
+
+    def __init__(self, pipeline):
+        steps = pipeline.named_steps
+        tfidf, lr = steps["tfidf"], steps["lr"]
+        if "hash" in steps:
+            vectorizer  = steps["hash"]
+            self.column = partial(hashed_column, n_features=vectorizer.n_features)
+        else:
+            vectorizer  = tfidf
+            self.column = tfidf.vocabulary_.get  # None = out of vocabulary
+        self.analyze   = vectorizer.build_analyzer()  # same preprocessing/tokens/n-grams as sklearn
+        self.sublinear = tfidf.sublinear_tf
+        self.normalize = tfidf.norm == "l2"
+        coef = lr.coef_[0]
+        idf  = tfidf.idf_ if tfidf.use_idf else np.ones(len(coef))
+        # column → lr weight × idf, and column → idf
+        self.w_idf     = (coef * idf).tolist()
+        self.idf       = idf.tolist()
+        self.intercept = float(lr.intercept_[0])
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Build a fused scorer, or return None if the pipeline has another shape."""
+        steps = getattr(pipeline, "named_steps", {})
+        if list(steps) == ["hash", "tfidf", "lr"]:
+            hasher, tfidf, lr = steps["hash"], steps["tfidf"], steps["lr"]
+            if not isinstance(hasher, HashingVectorizer) or not isinstance(tfidf, TfidfTransformer):
+                return None
+            # The hasher must emit raw counts: no signs, binary flags or its own norm
+            if hasher.alternate_sign or hasher.binary or hasher.norm is not None:
+                return None
+        elif list(steps) == ["tfidf", "lr"]:
+            tfidf, lr = steps["tfidf"], steps["lr"]
+            if not isinstance(tfidf, TfidfVectorizer) or tfidf.binary:
+                return None
+        else:
+            return None
+        if not isinstance(lr, LogisticRegression):
+            return None
+        if tfidf.norm not in ("l2", None) or lr.coef_.shape[0] != 1:
+            return None
+        return cls(pipeline)
+
+    def score(self, text: str) -> float:
+        counts = {}
+        for term in self.analyze(text):
+            col = self.column(term)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+
+        dot = norm_sq = 0.0
+        for col, count in counts.items():
+            idf = self.idf[col]
+            tf  = 1.0 + math.log(count) if self.sublinear else float(count)
+            dot     += self.w_idf[col] * tf
+            norm_sq += (idf * tf) ** 2
+
+        if self.normalize and norm_sq > 0:
+            dot /= math.sqrt(norm_sq)
+        z = dot + self.intercept
+        # numerically stable sigmoid
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def predict_proba(self, texts) -> np.ndarray:
+        """Drop-in for pipeline.predict_proba: columns are [P(legit), P(scam)]."""
+        scam = np.array([self.score(t) for t in texts])
+        return np.column_stack([1.0 - scam, scam])
+
+
+def score_batch(model, texts) -> np.ndarray:
+    """P(scam) for each text from one predict_proba call (fitted pipeline or FusedScamScorer)."""
+    return model.predict_proba(list(texts))[:, 1]
 
 
 # ─── Train & Save ─────────────────────────────────────────────────────────────
@@ -195,10 +395,12 @@ def train_model():
     )
 
     pipeline = Pipeline([
-        ("tfidf", TfidfVectorizer(
-            ngram_range=(1, 2), max_features=5000,
-            sublinear_tf=True, min_df=1,
+        # Stateless hashing: no vocabulary to build or share between workers
+        ("hash", HashingVectorizer(
+            n_features=2**14, ngram_range=(1, 2),
+            alternate_sign=False, norm=None,
         )),
+        ("tfidf", TfidfTransformer(sublinear_tf=True)),
         ("lr", LogisticRegression(
             class_weight="balanced", max_iter=1000,
             C=1.0, random_state=42,
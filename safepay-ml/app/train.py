@@ -11,6 +11,7 @@ Run this once to train + save models.
 import pandas as pd
 import numpy as np
 import joblib
+import hashlib
 import json
 import os
 import sys
@@ -26,7 +27,9 @@ from sklearn.metrics import (
 
 # Add parent dir to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from features import engineer_features, FEATURE_COLUMNS, build_user_baselines
+import features
+from iforest import CompiledIsolationForest
+from features import engineer_features, FEATURE_COLUMNS, build_user_baselines, save_baselines, BASELINE_FILES
 
 # --- Config ---
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
@@ -34,6 +37,52 @@ ANOMALY_THRESHOLD = 0.5   # Isolation Forest contamination estimate
 RISK_WEIGHT_ANOMALY = 0.6
 RISK_WEIGHT_FRAUD   = 0.4
 
+# Transaction data schema: MCCs stay strings (matching HIGH_RISK_MCCS), text columns are Arrow strings
+TRANSACTION_DTYPES = {
+    "transaction_id": "string[pyarrow]",
+    "user_id":        "string[pyarrow]",
+    "merchant":       "string[pyarrow]",
+    "mcc":            "string[pyarrow]",
+    "city":           "string[pyarrow]",
+    "amount":         "float64",
+    "is_fraud":       "int8",
+}
+
+
+# generate_data.py output, in order of preference (Parquet by default, CSV with --format csv)
+DATA_DIR   = os.path.join(os.path.dirname(__file__), "..", "data")
+DATA_FILES = ("transactions.parquet", "transactions.csv")
+
+
+def find_data_path():
+    """The first of DATA_FILES present in DATA_DIR, or None."""
+    for name in DATA_FILES:
+        path = os.path.join(DATA_DIR, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_transactions(data_path: str) -> pd.DataFrame:
+    """Read a Parquet or CSV transactions file with TRANSACTION_DTYPES."""
+    if data_path.endswith(".parquet"):
+        return pd.read_parquet(data_path).astype(TRANSACTION_DTYPES)
+    return pd.read_csv(data_path, engine="pyarrow", dtype=TRANSACTION_DTYPES, parse_dates=["timestamp"])
+
+
+def feature_cache_path(data_path: str) -> str:
+    """
+    Parquet file for the engineered features of `data_path`, keyed by the data
+    file's name, size + mtime, the TRANSACTION_DTYPES it is read with and the
+    source of features.py (so a change to any of them misses).
+    """
+    stat = os.stat(data_path)
+    with open(features.__file__, "rb") as f:
+        source = f.read()
+    key = hashlib.blake2b(str((os.path.basename(data_path), stat.st_size, stat.st_mtime_ns,
+                               TRANSACTION_DTYPES, source)).encode()).hexdigest()[:16]
+    return os.path.join(MODEL_DIR, "cache", f"features_{key}.parquet")
+
 
 def train_isolation_forest(X_train: np.ndarray, contamination: float = 0.07):
     """
@@ -92,6 +141,12 @@ def compute_risk_score(anomaly_score: float, fraud_prob: float) -> float:
     return round(min(max(raw, 0.0), 1.0), 4)
 
 
+def compute_risk_scores(anomaly_scores: np.ndarray, fraud_probs: np.ndarray) -> np.ndarray:
+    """Vectorized compute_risk_score() over arrays of scores."""
+    raw = RISK_WEIGHT_ANOMALY * anomaly_scores + RISK_WEIGHT_FRAUD * fraud_probs
+    return np.round(np.clip(raw, 0.0, 1.0), 4)
+
+
 def normalize_anomaly_scores(scores: np.ndarray) -> np.ndarray:
     """
     Convert Isolation Forest raw scores to 0–1 range.
@@ -119,10 +174,7 @@ def evaluate_final_risk(feature_df, iso, lr, scaler, threshold=0.5):
     fraud_probs = lr.predict_proba(X_scaled)[:, 1]
 
     # Final risk scores
-    risk_scores = np.array([
-        compute_risk_score(a, f)
-        for a, f in zip(anomaly_scores, fraud_probs)
-    ])
+    risk_scores = compute_risk_scores(anomaly_scores, fraud_probs)
 
     # Classify at threshold
     predictions = (risk_scores >= threshold).astype(int)
@@ -146,23 +198,29 @@ def main():
     os.makedirs(MODEL_DIR, exist_ok=True)
 
     # --- Load data ---
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "transactions.csv")
-    if not os.path.exists(data_path):
-        print("⚠️  No transactions.csv found. Run generate_data.py first.")
+    data_path = find_data_path()
+    if data_path is None:
+        print("⚠️  No transactions data found. Run generate_data.py first.")
         print("   Generating synthetic data now...")
-        os.chdir(os.path.join(os.path.dirname(__file__), "..", "data"))
         import subprocess
-        subprocess.run(["python3", "generate_data.py"])
-        os.chdir(os.path.dirname(__file__))
+        subprocess.run(["python3", "generate_data.py"], cwd=DATA_DIR)
+        data_path = find_data_path()
 
-    print("📂 Loading transaction data...")
-    df = pd.read_csv(data_path)
+    print(f"📂 Loading transaction data from {os.path.basename(data_path)}...")
+    df = load_transactions(data_path)
     print(f"   {len(df)} transactions loaded")
 
     # --- Feature Engineering ---
     print("\n⚙️  Engineering features...")
     baselines = build_user_baselines(df)
-    feature_df = engineer_features(df, baselines)
+    cache_path = feature_cache_path(data_path)
+    if os.path.exists(cache_path):
+        feature_df = pd.read_parquet(cache_path)
+        print(f"   ♻️  Loaded {len(feature_df)} cached feature rows from {cache_path}")
+    else:
+        feature_df = engineer_features(df, baselines)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        feature_df.to_parquet(cache_path, compression="zstd")
 
     X = feature_df[FEATURE_COLUMNS].values
     y = feature_df["is_fraud"].values
@@ -183,9 +241,11 @@ def main():
     # --- Save Models + Artifacts ---
     print("\n💾 Saving models...")
     joblib.dump(iso,     os.path.join(MODEL_DIR, "isolation_forest.pkl"))
+    # Flat node arrays the API memory-maps instead of unpickling sklearn trees
+    CompiledIsolationForest(iso).save(os.path.join(MODEL_DIR, "isolation_forest_nodes"))
     joblib.dump(lr,      os.path.join(MODEL_DIR, "logistic_regression.pkl"))
     joblib.dump(scaler,  os.path.join(MODEL_DIR, "scaler.pkl"))
-    joblib.dump(baselines, os.path.join(MODEL_DIR, "baselines.pkl"))
+    save_baselines(baselines, MODEL_DIR)
 
     # Save feature column order (important for inference)
     with open(os.path.join(MODEL_DIR, "feature_columns.json"), "w") as f:
@@ -202,13 +262,27 @@ def main():
     with open(os.path.join(MODEL_DIR, "feature_importance.json"), "w") as f:
         json.dump(feature_importance_sorted, f, indent=2)
 
+    # Raw anomaly score range over all rows: the API maps live scores onto 0–1 with it
+    raw_scores = iso.score_samples(X)
+    score_range = {
+        "min":         float(raw_scores.min()),
+        "max":         float(raw_scores.max()),
+        "fraud_mean":  float(raw_scores[y == 1].mean()),
+        "normal_mean": float(raw_scores[y == 0].mean()),
+    }
+    with open(os.path.join(MODEL_DIR, "anomaly_score_range.json"), "w") as f:
+        json.dump(score_range, f, indent=2)
+
     print("\n✅ All models saved:")
     print(f"   {MODEL_DIR}/isolation_forest.pkl")
+    print(f"   {MODEL_DIR}/isolation_forest_nodes/")
     print(f"   {MODEL_DIR}/logistic_regression.pkl")
     print(f"   {MODEL_DIR}/scaler.pkl")
-    print(f"   {MODEL_DIR}/baselines.pkl")
+    for filename in BASELINE_FILES.values():
+        print(f"   {MODEL_DIR}/{filename}")
     print(f"   {MODEL_DIR}/feature_columns.json")
     print(f"   {MODEL_DIR}/feature_importance.json")
+    print(f"   {MODEL_DIR}/anomaly_score_range.json")
     print("\n🎉 Training complete! Run api.py to start the scoring service.")
 
 
@@ -5,12 +5,18 @@ Generates realistic senior spending patterns + injected fraud cases
 
 import pandas as pd
 import numpy as np
+from pandas.api.types import union_categoricals
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
-import random
+import argparse
+import csv
 import json
+import os
+from joblib import Parallel, delayed
 
-np.random.seed(42)
-random.seed(42)
+# Shared generator for generate_transaction(); generate_columns() seeds its own
+_RNG = np.random.default_rng(42)
 
 # --- Senior Profiles ---
 SENIORS = [
@@ -62,89 +68,263 @@ CITIES_BY_SENIOR = {
 
 FRAUD_CITIES = ["Lagos", "Minsk", "Unknown City", "Chicago", "New York"]
 
+# MCC codes as constant tuples for per-transaction sampling
+NORMAL_MCC_CODES = tuple(NORMAL_MCCS)
+RISKY_MCC_CODES  = tuple(RISKY_MCCS)
 
-def generate_transaction(user, date, is_fraud=False, fraud_type=None):
-    """Generate a single transaction for a senior user."""
+FRAUD_TYPES = ["large_amount", "gift_card", "unusual_hour", "new_location"]
+
+# Relative likelihood of a transaction in each hour of the day (seniors shop by day)
+HOUR_WEIGHTS     = np.array([1,1,1,1,1,2,3,5,7,8,8,7,7,8,8,7,6,5,5,5,4,3,2,1], dtype=np.float64)
+HOUR_P           = HOUR_WEIGHTS / HOUR_WEIGHTS.sum()
+
+# --- Column-array views of the tables above, for vectorized sampling ---
+# Text columns are sampled as integer codes and returned as pd.Categorical
+# over these fixed category lists (USER_IDS, CITY_NAMES, MCCS, MERCHANTS)
+USER_IDS  = np.array([s["user_id"] for s in SENIORS], dtype=object)
+AVG_SPEND = np.array([s["avg_spend"] for s in SENIORS], dtype=np.float64)
+STD_SPEND = np.array([s["std_spend"] for s in SENIORS], dtype=np.float64)
+
+CITY_NAMES   = list(dict.fromkeys([c for u in USER_IDS for c in CITIES_BY_SENIOR[u]] + FRAUD_CITIES))
+CITIES       = np.array([[CITY_NAMES.index(c) for c in CITIES_BY_SENIOR[u]] for u in USER_IDS])  # (n_users, n_cities)
+FRAUD_CITY_CODES = np.array([CITY_NAMES.index(c) for c in FRAUD_CITIES])
+# Each senior uses devices dev_<user_id>_1..3
+DEVICE_IDS = np.array([[f"dev_{u}_{d}" for d in range(1, 4)] for u in USER_IDS], dtype=object)
+
+# Normal MCCs take codes 0..len(NORMAL_MCCS)-1, risky ones the rest
+MCCS             = np.array([*NORMAL_MCC_CODES, *RISKY_MCC_CODES], dtype=object)
+MCC_DESCRIPTIONS = np.array([*NORMAL_MCCS.values(), *RISKY_MCCS.values()], dtype=object)
+GIFT_CARD_MCC    = list(MCCS).index("6051")
+
+# Row i = codes into MERCHANTS of the merchants of MCCS[i], padded with -1 to
+# the longest list; only the first MERCHANT_COUNTS[i] entries are real
+MERCHANTS       = list(dict.fromkeys(m for mcc in MCCS for m in MERCHANTS_BY_MCC[mcc]))
+MERCHANT_COUNTS = np.array([len(MERCHANTS_BY_MCC[mcc]) for mcc in MCCS])
+MERCHANT_MATRIX = np.array([
+    [MERCHANTS.index(m) for m in MERCHANTS_BY_MCC[mcc]] + [-1] * (MERCHANT_COUNTS.max() - len(MERCHANTS_BY_MCC[mcc]))
+    for mcc in MCCS
+])
+
+# Per fraud type (FRAUD_TYPES order): uniform amount range; gift cards use fixed values
+FRAUD_AMOUNT_LOW  = np.array([300.0, 0.0, 50.0, 200.0])
+FRAUD_AMOUNT_HIGH = np.array([2000.0, 0.0, 400.0, 1500.0])
+GIFT_CARD_AMOUNTS = np.array([100.0, 200.0, 500.0, 1000.0])
+
+
+def _pick(rng, seq):
+    """Uniform choice from a sequence, returning the element itself (not a NumPy scalar)."""
+    return seq[rng.integers(len(seq))]
+
+
+def generate_transaction(user, date, is_fraud=False, fraud_type=None, rng=None):
+    """Generate a single transaction for a senior user (draws from `rng`, default _RNG)."""
+    rng = _RNG if rng is None else rng
 
     if is_fraud:
-        mcc = random.choice(list(RISKY_MCCS.keys()))
-        merchant = random.choice(MERCHANTS_BY_MCC[mcc])
-        city = random.choice(FRAUD_CITIES)
+        mcc = _pick(rng, RISKY_MCC_CODES)
+        merchant = _pick(rng, MERCHANTS_BY_MCC[mcc])
+        city = _pick(rng, FRAUD_CITIES)
 
         if fraud_type == "large_amount":
-            amount = round(np.random.uniform(300, 2000), 2)
+            amount = round(rng.uniform(300, 2000), 2)
         elif fraud_type == "gift_card":
-            amount = round(random.choice([100, 200, 500, 1000]), 2)
+            amount = round(_pick(rng, [100, 200, 500, 1000]), 2)
             mcc = "6051"
-            merchant = random.choice(MERCHANTS_BY_MCC["6051"])
+            merchant = _pick(rng, MERCHANTS_BY_MCC["6051"])
         elif fraud_type == "unusual_hour":
-            amount = round(np.random.uniform(50, 400), 2)
-            date = date.replace(hour=random.randint(1, 4))  # 1-4 AM
+            amount = round(rng.uniform(50, 400), 2)
+            hour = int(rng.integers(1, 5))  # 1-4 AM
         else:
-            amount = round(np.random.uniform(200, 1500), 2)
+            amount = round(rng.uniform(200, 1500), 2)
 
         label = 1  # fraudulent
     else:
-        mcc = random.choice(list(NORMAL_MCCS.keys()))
-        merchant = random.choice(MERCHANTS_BY_MCC[mcc])
-        city = random.choice(CITIES_BY_SENIOR[user["user_id"]])
-        amount = max(1.0, round(np.random.normal(user["avg_spend"], user["std_spend"]), 2))
+        mcc = _pick(rng, NORMAL_MCC_CODES)
+        merchant = _pick(rng, MERCHANTS_BY_MCC[mcc])
+        city = _pick(rng, CITIES_BY_SENIOR[user["user_id"]])
+        amount = max(1.0, round(rng.normal(user["avg_spend"], user["std_spend"]), 2))
         label = 0  # normal
 
-    hour = date.hour if is_fraud and fraud_type == "unusual_hour" else random.choices(
-        range(24),
-        weights=[1,1,1,1,1,2,3,5,7,8,8,7,7,8,8,7,6,5,5,5,4,3,2,1],
-        k=1
-    )[0]
+    if not (is_fraud and fraud_type == "unusual_hour"):
+        hour = int(rng.choice(24, p=HOUR_P))
 
     return {
-        "transaction_id": f"txn_{random.randint(100000, 999999)}",
+        "transaction_id": f"txn_{rng.integers(100000, 1000000)}",
         "user_id": user["user_id"],
         "amount": amount,
         "merchant": merchant,
         "mcc": mcc,
         "mcc_description": RISKY_MCCS.get(mcc, NORMAL_MCCS.get(mcc, "Other")),
-        "timestamp": date.replace(hour=hour, minute=random.randint(0, 59)).isoformat(),
+        "timestamp": date.replace(hour=hour, minute=int(rng.integers(0, 60))).isoformat(),
         "city": city,
-        "device_id": f"dev_{user['user_id']}_{random.randint(1,3)}",
+        "device_id": f"dev_{user['user_id']}_{rng.integers(1, 4)}",
         "authorized": True,
         "is_fraud": label,
     }
 
 
-def generate_dataset(n_normal=2000, n_fraud=150):
-    """Generate full dataset with normal + fraud transactions across all seniors."""
-    transactions = []
-    start_date = datetime.now() - timedelta(days=90)
+# Rows per independently seeded chunk; larger datasets are generated chunk by chunk
+CHUNK_ROWS = 100_000
+
+
+def _generate_chunk(n_normal, n_fraud, seed, midnight) -> dict:
+    """Unsorted column arrays for n_normal + n_fraud transactions, days counted from `midnight`."""
+    rng = np.random.default_rng(seed)
+    n = n_normal + n_fraud
+
+    user_idx = rng.integers(0, len(SENIORS), n)
+    days     = rng.integers(0, 90, n)
+    is_fraud = np.arange(n) >= n_normal  # normal rows first, fraud rows injected after
 
     # --- Normal transactions ---
-    for _ in range(n_normal):
-        user = random.choice(SENIORS)
-        days_offset = random.randint(0, 89)
-        date = start_date + timedelta(days=days_offset)
-        transactions.append(generate_transaction(user, date, is_fraud=False))
+    normal_users = user_idx[:n_normal]
+    normal_mcc   = rng.integers(0, len(NORMAL_MCCS), n_normal)
+    normal_city  = CITIES[normal_users, rng.integers(0, CITIES.shape[1], n_normal)]
+    normal_amt   = np.maximum(1.0, rng.normal(AVG_SPEND[normal_users], STD_SPEND[normal_users]).round(2))
+    normal_hour  = rng.choice(24, size=n_normal, p=HOUR_P)
 
     # --- Fraud transactions (injected) ---
-    fraud_types = ["large_amount", "gift_card", "unusual_hour", "new_location"]
-    for _ in range(n_fraud):
-        user = random.choice(SENIORS)
-        days_offset = random.randint(0, 89)
-        date = start_date + timedelta(days=days_offset)
-        fraud_type = random.choice(fraud_types)
-        transactions.append(generate_transaction(user, date, is_fraud=True, fraud_type=fraud_type))
+    fraud_type = rng.integers(0, len(FRAUD_TYPES), n_fraud)
+    gift_card  = fraud_type == FRAUD_TYPES.index("gift_card")
+    fraud_mcc  = np.where(gift_card, GIFT_CARD_MCC, rng.integers(len(NORMAL_MCCS), len(MCCS), n_fraud))
+    fraud_city = FRAUD_CITY_CODES[rng.integers(0, len(FRAUD_CITIES), n_fraud)]
+    fraud_amt  = np.where(
+        gift_card,
+        rng.choice(GIFT_CARD_AMOUNTS, n_fraud),
+        rng.uniform(FRAUD_AMOUNT_LOW[fraud_type], FRAUD_AMOUNT_HIGH[fraud_type]),
+    ).round(2)
+    fraud_hour = np.where(
+        fraud_type == FRAUD_TYPES.index("unusual_hour"),
+        rng.integers(1, 5, n_fraud),  # 1-4 AM
+        rng.choice(24, size=n_fraud, p=HOUR_P),
+    )
+
+    mcc_idx  = np.concatenate([normal_mcc, fraud_mcc])
+    merchant = MERCHANT_MATRIX[mcc_idx, rng.integers(0, MERCHANT_COUNTS[mcc_idx])]
+    hours    = np.concatenate([normal_hour, fraud_hour])
+    minutes  = rng.integers(0, 60, n)
+    # Offsets from midnight as int64 seconds: one add onto the datetime64 base
+    seconds  = days * 86400 + hours * 3600 + minutes * 60
+
+    return {
+        # One draw for all ids; formatting a list of ints beats np.char.add here
+        "transaction_id":  np.array([f"txn_{i}" for i in rng.integers(100000, 1000000, n).tolist()], dtype=object),
+        "user_id":         pd.Categorical.from_codes(user_idx, USER_IDS),
+        "amount":          np.concatenate([normal_amt, fraud_amt]),
+        "merchant":        pd.Categorical.from_codes(merchant, MERCHANTS),
+        "mcc":             pd.Categorical.from_codes(mcc_idx, MCCS),
+        "mcc_description": pd.Categorical.from_codes(mcc_idx, MCC_DESCRIPTIONS),
+        "timestamp":       midnight + seconds.astype("timedelta64[s]"),
+        "city":            pd.Categorical.from_codes(np.concatenate([normal_city, fraud_city]), CITY_NAMES),
+        "device_id":       DEVICE_IDS[user_idx, rng.integers(0, DEVICE_IDS.shape[1], n)],
+        "authorized":      np.ones(n, dtype=bool),
+        "is_fraud":        is_fraud.astype(np.int8),
+    }
 
-    df = pd.DataFrame(transactions)
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df = df.sort_values("timestamp").reset_index(drop=True)
 
-    print(f"✅ Generated {len(df)} transactions")
-    print(f"   Normal: {(df['is_fraud']==0).sum()} | Fraud: {(df['is_fraud']==1).sum()}")
-    print(f"   Users: {df['user_id'].nunique()}")
-    return df
+def generate_columns(n_normal=2000, n_fraud=150, seed=42, n_jobs=-1, start_date=None) -> dict:
+    """
+    Generate normal + fraud transactions across all seniors as a dict of
+    column arrays sorted by timestamp (the generate_transaction fields).
+    Every column is drawn as one NumPy array with the same distributions as
+    generate_transaction, so there is no per-row Python loop.
+
+    dtypes: user_id/merchant/mcc/mcc_description/city categorical (int8
+    codes), timestamp datetime64[s], amount float64, authorized bool,
+    is_fraud int8, ids object. train.load_transactions() reads the written
+    files back with train.TRANSACTION_DTYPES instead: string[pyarrow] ids,
+    user_id, merchant, mcc and city, float64 amount and int8 is_fraud; the
+    other columns come back as the Parquet/CSV reader infers them.
+
+    More than CHUNK_ROWS rows are split into chunks with their own child
+    seeds, generated on n_jobs workers (default -1: all cores; smaller
+    datasets are one chunk and start no workers). The output depends only
+    on the seed and start_date (default: 90 days before now), not n_jobs.
+    The clock is read once and every chunk gets the same datetime64 base.
+    """
+    n = n_normal + n_fraud
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=90)
+    midnight = np.datetime64(start_date.replace(hour=0, minute=0, second=0, microsecond=0), "s")
+
+    n_chunks = -(-n // CHUNK_ROWS)
+    if n_chunks <= 1:
+        columns = _generate_chunk(n_normal, n_fraud, seed, midnight)
+    else:
+        normal_sizes = np.diff(np.linspace(0, n_normal, n_chunks + 1).astype(np.int64))
+        fraud_sizes  = np.diff(np.linspace(0, n_fraud, n_chunks + 1).astype(np.int64))
+        chunks = Parallel(n_jobs=n_jobs)(
+            delayed(_generate_chunk)(int(n_nrm), int(n_frd), chunk_seed, midnight)
+            for n_nrm, n_frd, chunk_seed in zip(normal_sizes, fraud_sizes, np.random.SeedSequence(seed).spawn(n_chunks))
+        )
+        columns = {
+            name: (union_categoricals if isinstance(chunks[0][name], pd.Categorical) else np.concatenate)(
+                [c[name] for c in chunks])
+            for name in chunks[0]
+        }
+
+    # Stable, so rows in the same minute keep generation order (per chunk, normal before fraud)
+    order = np.argsort(columns["timestamp"], kind="stable")
+    columns = {name: values[order] for name, values in columns.items()}
+
+    print(f"✅ Generated {n} transactions")
+    print(f"   Normal: {n_normal} | Fraud: {n_fraud}")
+    print(f"   Users: {len(np.unique(columns['user_id']))}")
+    return columns
+
+
+def write_csv(columns: dict, path: str):
+    """
+    Write generate_columns() output as CSV straight from the arrays (same
+    text as DataFrame.to_csv(index=False), without building the frame).
+    """
+    values = dict(columns)
+    values["timestamp"] = np.char.replace(np.datetime_as_string(values["timestamp"]), "T", " ")
+    rows = zip(*(v.tolist() for v in values.values()))
+    with open(path, "w", newline="", buffering=1 << 20) as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(values.keys())
+        writer.writerows(rows)
+
+
+def write_parquet(columns: dict, path: str):
+    """Write generate_columns() output as a zstd-compressed Parquet file."""
+    pq.write_table(pa.table(columns), path, compression="zstd")
+
+
+WRITERS = {"parquet": write_parquet, "csv": write_csv}
+
+
+def generate_dataset(n_normal=2000, n_fraud=150, seed=42, n_jobs=-1, start_date=None,
+                     output=None, as_arrow=False):
+    """
+    Generate full dataset with normal + fraud transactions across all seniors.
+
+    output:   optional path ending in .parquet or .csv to also write the data
+              to; None (default) skips file I/O entirely.
+    as_arrow: return a pyarrow.Table built from the column arrays instead of
+              a pandas DataFrame.
+    """
+    columns = generate_columns(n_normal, n_fraud, seed, n_jobs, start_date)
+    if output is not None:
+        fmt = os.path.splitext(output)[1].lstrip(".")
+        if fmt not in WRITERS:
+            raise ValueError(f"Unsupported output format {output!r} (expected one of: {', '.join(WRITERS)})")
+        WRITERS[fmt](columns, output)
+    return pa.table(columns) if as_arrow else pd.DataFrame(columns)
 
 
 if __name__ == "__main__":
-    df = generate_dataset()
-    df.to_csv("transactions.csv", index=False)
-    print("💾 Saved to transactions.csv")
-    print(df.head(3).to_string())
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--format", choices=list(WRITERS), default="parquet",
+                        help="output file format (default: parquet)")
+    parser.add_argument("--n-normal", type=int, default=2000, help="normal transactions (default: 2000)")
+    parser.add_argument("--n-fraud", type=int, default=150, help="fraud transactions (default: 150)")
+    parser.add_argument("--n-jobs", type=int, default=-1,
+                        help=f"workers for datasets over {CHUNK_ROWS} rows (default: -1, all cores)")
+    args = parser.parse_args()
+
+    path = f"transactions.{args.format}"
+    table = generate_dataset(args.n_normal, args.n_fraud, n_jobs=args.n_jobs, output=path, as_arrow=True)
+    print(f"💾 Saved to {path}")
+    print(table.slice(0, 3).to_pandas().to_string())
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# The app modules import each other as top-level modules (see api.py)
+APP_DIR = os.path.join(os.path.dirname(__file__), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "transactions.csv")
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+
+
+@pytest.fixture(scope="session")
+def transactions() -> pd.DataFrame:
+    """The committed synthetic dataset, MCCs as strings like the API receives them."""
+    return pd.read_csv(DATA_PATH, dtype={"mcc": str}, parse_dates=["timestamp"])
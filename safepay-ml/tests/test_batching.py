@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+
+from batching import DynBatcher
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def submit_all(batcher, items):
+    return await asyncio.gather(*(batcher.process_batched(i) for i in items), return_exceptions=True)
+
+
+def test_results_are_returned_in_order():
+    async def main():
+        batcher = DynBatcher(lambda items: [i * 2 for i in items])
+        await batcher.start()
+        try:
+            return await submit_all(batcher, range(5))
+        finally:
+            await batcher.stop()
+
+    assert run(main()) == [0, 2, 4, 6, 8]
+
+
+def test_exception_result_fails_only_its_item():
+    async def main():
+        batcher = DynBatcher(lambda items: [ValueError(i) if i == 1 else i for i in items])
+        await batcher.start()
+        try:
+            return await submit_all(batcher, range(3))
+        finally:
+            await batcher.stop()
+
+    first, second, third = run(main())
+    assert (first, third) == (0, 2)
+    assert isinstance(second, ValueError)
+
+
+@pytest.mark.parametrize("bad_batch_fn, error", [
+    (lambda items: 1 / 0, ZeroDivisionError),        # batch_fn raises
+    (lambda items: None, TypeError),                 # not a results list
+    (lambda items: items[:-1], RuntimeError),        # one result short
+])
+def test_failed_batch_fails_its_callers_and_worker_survives(bad_batch_fn, error):
+    calls = []
+
+    def batch_fn(items):
+        calls.append(items)
+        return bad_batch_fn(items) if len(calls) == 1 else list(items)
+
+    async def main():
+        batcher = DynBatcher(batch_fn)
+        await batcher.start()
+        try:
+            failed = await submit_all(batcher, [1, 2])
+            ok = await submit_all(batcher, [3, 4])
+            return failed, ok
+        finally:
+            await batcher.stop()
+
+    failed, ok = run(main())
+    assert all(isinstance(r, error) for r in failed)
+    assert ok == [3, 4]
+
+
+def test_stop_mid_batch_cancels_pending_callers():
+    entered, release = threading.Event(), threading.Event()
+
+    def batch_fn(items):
+        entered.set()
+        release.wait(5)
+        return list(items)
+
+    async def main():
+        batcher = DynBatcher(batch_fn)
+        await batcher.start()
+        caller = asyncio.create_task(batcher.process_batched(1))
+        await asyncio.to_thread(entered.wait, 5)
+        await batcher.stop()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+    run(main())
+
+
+def test_process_batched_requires_start():
+    with pytest.raises(RuntimeError):
+        run(DynBatcher(list).process_batched(1))
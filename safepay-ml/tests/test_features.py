@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import (
+    FEATURE_COLUMNS, LIVE_FEATURE_COLUMNS, build_user_baselines, compact_baseline,
+    engineer_features, engineer_features_compiled, engineer_features_single,
+    load_baselines, numba_baseline, parse_timestamp, save_baselines, wall_clock_epoch,
+)
+
+LOOK_BACK_COLUMNS = ["rolling_7d_total", "rolling_7d_count", "velocity_1h", "mcc_freq_score",
+                     "is_new_merchant", "is_new_mcc", "is_new_city"]
+
+
+def reference_look_back(df: pd.DataFrame) -> pd.DataFrame:
+    """Row-by-row look-back features: only strictly earlier txns of the same user count."""
+    rows = []
+    for _, txn in df.iterrows():
+        user_df = df[df["user_id"] == txn["user_id"]]
+        prior = user_df[user_df["timestamp"] < txn["timestamp"]]
+        # Same rule as build_user_baselines: non-fraud rows, or all rows for a user without any
+        known = prior if (user_df["is_fraud"] == 1).all() else prior[prior["is_fraud"] == 0]
+        week = prior[prior["timestamp"] >= txn["timestamp"] - pd.Timedelta(days=7)]
+        rows.append({
+            "rolling_7d_total": week["amount"].sum(),
+            "rolling_7d_count": len(week),
+            "velocity_1h":      (prior["timestamp"] >= txn["timestamp"] - pd.Timedelta(hours=1)).sum(),
+            "mcc_freq_score":   round((prior["mcc"] == txn["mcc"]).mean(), 4) if len(prior) else 0.0,
+            "is_new_merchant":  int(txn["merchant"] not in set(known["merchant"])),
+            "is_new_mcc":       int(txn["mcc"] not in set(known["mcc"])),
+            "is_new_city":      int(txn["city"] not in set(known["city"])),
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="module")
+def sample(transactions) -> pd.DataFrame:
+    """A few hundred rows with same-timestamp ties and a user with only fraud rows."""
+    df = transactions.head(300).copy()
+    df.loc[10:30, "timestamp"] = df.loc[10, "timestamp"]
+    df.loc[df["user_id"] == df["user_id"].iloc[0], "is_fraud"] = 1
+    return df.sort_values(["user_id", "timestamp"], kind="stable").reset_index(drop=True)
+
+
+def test_history_features_match_row_by_row_reference(sample):
+    features = engineer_features(sample)
+    expected = reference_look_back(sample)
+    for col in LOOK_BACK_COLUMNS:
+        np.testing.assert_allclose(features[col].to_numpy(np.float64), expected[col], rtol=1e-6, err_msg=col)
+
+
+def test_fraud_rows_are_new_like_at_serve_time(transactions):
+    features = engineer_features(transactions)
+    fraud = features[features["is_fraud"] == 1]
+    baselines = build_user_baselines(transactions)
+    for col, known in (("merchant", "known_merchants"), ("mcc", "known_mccs"), ("city", "known_cities")):
+        served = [int(v not in baselines[u][known]) for u, v in zip(fraud["user_id"], fraud[col])]
+        np.testing.assert_array_equal(fraud[f"is_new_{col}"].to_numpy(), served)
+
+
+def live_transactions(baselines):
+    for user_id in list(baselines) + ["unknown_user"]:
+        for mcc in ("5411", "6051", " 5411", "541", "05411", "abc", 7995):
+            for city in ("Tampa", "Unknown City"):
+                yield user_id, {"amount": 123.45, "mcc": mcc, "merchant": "Kroger", "city": city,
+                                "timestamp": "2024-01-15T02:30:00.000Z"}
+
+
+def test_numba_kernel_matches_single_row_path(transactions):
+    baselines = build_user_baselines(transactions)
+    for user_id, txn in live_transactions(baselines):
+        baseline = baselines.get(user_id, {})
+        expected = engineer_features_single(txn, baseline)
+        np.testing.assert_array_equal(engineer_features_single(txn, compact_baseline(baseline)), expected)
+        np.testing.assert_array_equal(engineer_features_compiled(txn, numba_baseline(compact_baseline(baseline))), expected)
+
+
+def test_single_row_path_matches_batch_features_for_a_new_txn(transactions):
+    history = transactions[transactions["timestamp"] < transactions["timestamp"].max()]
+    baselines = build_user_baselines(history)
+    new = transactions.iloc[[-1]].assign(is_fraud=0)
+
+    batch = engineer_features(pd.concat([history, new]), baselines)
+    row = batch[batch["transaction_id"] == new["transaction_id"].iloc[0]].iloc[0]
+    txn = new.iloc[0].to_dict()
+    live = engineer_features_single(txn, baselines[txn["user_id"]])
+
+    cols = [FEATURE_COLUMNS.index(c) for c in LIVE_FEATURE_COLUMNS]
+    np.testing.assert_allclose(live[cols], row[list(LIVE_FEATURE_COLUMNS)].to_numpy(np.float64), atol=1e-4)
+
+
+def test_timestamps_accept_a_trailing_z():
+    assert parse_timestamp("2024-01-15T02:30:00.000Z") == parse_timestamp("2024-01-15T02:30:00+00:00")
+    assert wall_clock_epoch("2024-01-15T02:30:00Z") == wall_clock_epoch("2024-01-15T02:30:00")
+
+
+def test_baselines_round_trip_through_parquet(transactions, tmp_path):
+    baselines = build_user_baselines(transactions)
+    save_baselines(baselines, str(tmp_path))
+    loaded = load_baselines(str(tmp_path))
+
+    assert loaded.keys() == baselines.keys()
+    for user_id, b in baselines.items():
+        for field, value in b.items():
+            if field == "normal_hours":
+                np.testing.assert_array_equal(loaded[user_id][field], value)
+            elif isinstance(value, set):
+                assert loaded[user_id][field] == {str(v) for v in value}, field
+            else:
+                assert loaded[user_id][field] == pytest.approx(value), field
@@ -0,0 +1,53 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.ensemble._iforest import _average_path_length
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from conftest import MODEL_DIR
+from iforest import CompiledIsolationForest, average_path_length
+from scam_detector import FusedScamScorer, LEGIT_SAMPLES, SCAM_SAMPLES
+
+
+def test_average_path_length_matches_sklearn():
+    n = np.array([0, 1, 2, 3, 4, 10, 256, 1000, 10**6])
+    np.testing.assert_allclose(average_path_length(n), _average_path_length(n), rtol=1e-12)
+
+
+@pytest.mark.parametrize("max_features", [1.0, 0.5])
+def test_compiled_isolation_forest_matches_sklearn(max_features, tmp_path):
+    rng = np.random.default_rng(0)
+    X = np.vstack([rng.normal(size=(500, 6)), rng.normal(5, 1, size=(20, 6))])
+    iso = IsolationForest(n_estimators=50, max_features=max_features, random_state=0).fit(X)
+    expected = iso.score_samples(X)
+
+    compiled = CompiledIsolationForest(iso)
+    np.testing.assert_allclose(compiled.score_samples(X), expected, atol=1e-12)
+
+    compiled.save(str(tmp_path))
+    np.testing.assert_allclose(CompiledIsolationForest.load(str(tmp_path)).score_samples(X), expected, atol=1e-12)
+
+
+MESSAGES = SCAM_SAMPLES[:10] + LEGIT_SAMPLES[:10] + ["", "URGENT!!! verify your account now", "see you at lunch"]
+
+
+def test_fused_scorer_matches_committed_pipeline():
+    pipeline = joblib.load(os.path.join(MODEL_DIR, "scam_detector.pkl"))
+    scorer = FusedScamScorer.from_pipeline(pipeline)
+    assert scorer is not None
+    np.testing.assert_allclose(scorer.predict_proba(MESSAGES), pipeline.predict_proba(MESSAGES), atol=1e-12)
+
+
+def test_fused_scorer_matches_vocabulary_pipeline():
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)),
+        ("lr", LogisticRegression(max_iter=1000)),
+    ]).fit(SCAM_SAMPLES + LEGIT_SAMPLES, [1] * len(SCAM_SAMPLES) + [0] * len(LEGIT_SAMPLES))
+    scorer = FusedScamScorer.from_pipeline(pipeline)
+    assert scorer is not None
+    np.testing.assert_allclose(scorer.predict_proba(MESSAGES), pipeline.predict_proba(MESSAGES), atol=1e-12)